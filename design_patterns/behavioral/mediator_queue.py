@@ -0,0 +1,193 @@
+"""
+A queue-based variant of the Mediator pattern.
+
+In the classic version the mediator reacts to an event by calling components,
+which notify the mediator again from inside that call, so a cascade of events
+becomes a deep call stack. Here `notify` only puts the event on a queue. The
+first `notify` drains the queue in a loop, and events raised while draining are
+appended to it instead of being handled recursively.
+
+- reactions are looked up in a dict keyed by event name, no if/elif chain
+- every event name has a priority, and each priority has its own FIFO lane;
+  higher priority lanes are drained first
+- an event that is already waiting in the queue for the same sender is not
+  queued a second time
+- per-event metrics (queued, coalesced, handled, time spent, queue depth)
+
+>> uv run python design_patterns/behavioral/mediator_queue.py
+"""
+
+from __future__ import annotations
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Set, Tuple
+
+Reaction = Callable[[object], None]
+
+
+class Mediator:
+    def notify(self, sender: object, event: str) -> None:
+        pass
+
+
+@dataclass
+class EventMetrics:
+    queued: int = 0
+    coalesced: int = 0
+    handled: int = 0
+    seconds: float = 0.0
+
+
+class QueueMediator(Mediator):
+    def __init__(self) -> None:
+        self._routes: Dict[str, List[Reaction]] = {}
+        self._priorities: Dict[str, int] = {}
+
+        # priority -> lane; `_order` keeps the priorities sorted, highest first
+        self._lanes: Dict[int, Deque[Tuple[object, str]]] = {}
+        self._order: List[int] = []
+        self._pending: Set[Tuple[int, str]] = set()
+        self._draining = False
+
+        self.metrics: Dict[str, EventMetrics] = {}
+        self.max_depth = 0
+
+    def route(self, event: str, reaction: Reaction, priority: int = 0) -> None:
+        """
+        Run `reaction(sender)` whenever `event` is raised.
+        """
+
+        self._routes.setdefault(event, []).append(reaction)
+        self._priorities[event] = priority
+        if priority not in self._lanes:
+            self._lanes[priority] = deque()
+            self._order = sorted(self._lanes, reverse=True)
+
+    def notify(self, sender: object, event: str) -> None:
+        if event not in self._routes:
+            return
+
+        metrics = self.metrics.get(event)
+        if metrics is None:
+            metrics = self.metrics[event] = EventMetrics()
+
+        key = (id(sender), event)
+        if key in self._pending:
+            metrics.coalesced += 1
+            return
+
+        self._pending.add(key)
+        self._lanes[self._priorities[event]].append((sender, event))
+        metrics.queued += 1
+        self.max_depth = max(self.max_depth, len(self._pending))
+
+        if not self._draining:
+            self._drain()
+
+    def _drain(self) -> None:
+        self._draining = True
+        try:
+            while self._pending:
+                sender, event = self._next_event()
+                self._pending.discard((id(sender), event))
+
+                start = time.perf_counter()
+                for reaction in self._routes[event]:
+                    reaction(sender)
+
+                metrics = self.metrics[event]
+                metrics.handled += 1
+                metrics.seconds += time.perf_counter() - start
+        finally:
+            self._draining = False
+
+    def _next_event(self) -> Tuple[object, str]:
+        for priority in self._order:
+            lane = self._lanes[priority]
+            if lane:
+                return lane.popleft()
+
+        raise RuntimeError("pending events without a lane")
+
+
+class BaseComponent:
+    def __init__(self, mediator: Mediator = None) -> None:
+        self._mediator = mediator
+
+    @property
+    def mediator(self) -> Mediator:
+        return self._mediator
+
+    @mediator.setter
+    def mediator(self, mediator: Mediator) -> None:
+        self._mediator = mediator
+
+
+class Component1(BaseComponent):
+    def do_a(self) -> None:
+        print("Component 1 does A.")
+        self.mediator.notify(self, "A")
+
+    def do_b(self) -> None:
+        print("Component 1 does B.")
+        self.mediator.notify(self, "B")
+
+
+class Component2(BaseComponent):
+    def do_c(self) -> None:
+        print("Component 2 does C.")
+        self.mediator.notify(self, "C")
+
+    def do_d(self) -> None:
+        print("Component 2 does D.")
+        self.mediator.notify(self, "D")
+
+
+class ConcreteMediator(QueueMediator):
+    def __init__(self, component1: Component1, component2: Component2) -> None:
+        super().__init__()
+        self._component1 = component1
+        self._component1.mediator = self
+        self._component2 = component2
+        self._component2.mediator = self
+
+        self.route("A", lambda sender: print("Mediator reacts on A and triggers following operations:"))
+        self.route("A", lambda sender: self._component2.do_c())
+
+        self.route("D", lambda sender: print("Mediator reacts on D and triggers following operations:"),
+                   priority=1)
+        self.route("D", lambda sender: self._component1.do_b(), priority=1)
+        self.route("D", lambda sender: self._component2.do_c(), priority=1)
+
+
+if __name__ == "__main__":
+    c1 = Component1()
+    c2 = Component2()
+    mediator = ConcreteMediator(c1, c2)
+
+    print("Client triggers operation A.")
+    c1.do_a()
+
+    print("\n", end="")
+
+    print("Client triggers operation D.")
+    c2.do_d()
+
+    print("\n", end="")
+
+    # a chain of events that would blow the stack if handled recursively
+    ping = Component1(mediator)
+    remaining = [100_000]
+
+    def ping_again(sender: object) -> None:
+        remaining[0] -= 1
+        if remaining[0]:
+            mediator.notify(sender, "ping")
+
+    mediator.route("ping", ping_again)
+    mediator.notify(ping, "ping")
+
+    for event, metrics in mediator.metrics.items():
+        print(f"{event}: {metrics}")
+    print(f"max queue depth: {mediator.max_depth}")
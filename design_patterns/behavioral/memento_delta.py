@@ -0,0 +1,287 @@
+"""
+A memory-bounded variant of the Memento pattern.
+
+Instead of keeping a full copy of the state in every memento, the Caretaker
+keeps a full snapshot every few backups and stores only a binary delta against
+the previous state in between. Payloads can be compressed with zlib (or lz4 if
+it is installed) and the oldest history is evicted once a memory budget is hit.
+"""
+
+from __future__ import annotations
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import deque
+from random import sample
+from string import ascii_letters
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # lz4 is optional
+    lz4_frame = None
+
+
+Codec = Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]
+
+CODECS: Dict[Optional[str], Codec] = {
+    None: (bytes, bytes),
+    "zlib": (zlib.compress, zlib.decompress),
+}
+
+if lz4_frame is not None:
+    CODECS["lz4"] = (lz4_frame.compress, lz4_frame.decompress)
+
+
+class Originator:
+    _state = None
+
+    def __init__(self, state: str) -> None:
+        self._state = state
+        print(f"Originator: My initial state is: {self._state}")
+
+    def do_something(self) -> None:
+        print("Originator: I'm doing something important.")
+        self._state = self._generate_random_string(30)
+        print(f"Originator: and my state has changed to: {self._state}")
+
+    @staticmethod
+    def _generate_random_string(length: int = 10) -> str:
+        return "".join(sample(ascii_letters, length))
+
+    def save_bytes(self) -> bytes:
+        return self._state.encode()
+
+    def restore_bytes(self, data: bytes) -> None:
+        self._state = data.decode()
+        print(f"Originator: My state has changed to: {self._state}")
+
+
+class Memento(ABC):
+    __slots__ = ()
+
+    @abstractmethod
+    def get_name(self) -> str:
+        pass
+
+    @abstractmethod
+    def get_date(self) -> str:
+        pass
+
+
+class SnapshotMemento(Memento):
+    """
+    A full (possibly compressed) copy of the state. The timestamp is kept as a
+    float and only formatted when somebody asks for it.
+    """
+
+    __slots__ = ("_payload", "_timestamp", "_preview")
+
+    def __init__(self, payload: bytes, preview: str, timestamp: float) -> None:
+        self._payload = payload
+        self._preview = preview
+        self._timestamp = timestamp
+
+    def apply(self, previous: Optional[bytes], decompress: Callable) -> bytes:
+        return decompress(self._payload)
+
+    def size(self) -> int:
+        return len(self._payload)
+
+    def get_name(self) -> str:
+        return f"{self.get_date()} / ({self._preview}...)"
+
+    def get_date(self) -> str:
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self._timestamp))
+
+
+def _common_length(old: bytes, new: bytes, limit: int, from_end: bool) -> int:
+    """
+    Length of the common prefix (or suffix) of `old` and `new`, at most
+    `limit`. A binary search over slice comparisons: each comparison is a
+    memcmp, and only the not yet known part is compared, so it costs O(n)
+    bytes compared in O(log n) Python steps.
+    """
+
+    known, hi = 0, limit
+    while known < hi:
+        mid = (known + hi + 1) // 2
+        if from_end:
+            same = old[len(old) - mid:len(old) - known] == new[len(new) - mid:len(new) - known]
+        else:
+            same = old[known:mid] == new[known:mid]
+        if same:
+            known = mid
+        else:
+            hi = mid - 1
+    return known
+
+
+class DeltaMemento(SnapshotMemento):
+    """
+    Stores the state as a patch against the previous memento: the length of the
+    common prefix and suffix, plus the (compressed) bytes in between.
+    """
+
+    __slots__ = ("_prefix", "_suffix")
+
+    def __init__(self, prefix: int, suffix: int, payload: bytes,
+                 preview: str, timestamp: float) -> None:
+        super().__init__(payload, preview, timestamp)
+        self._prefix = prefix
+        self._suffix = suffix
+
+    @classmethod
+    def diff(cls, old: bytes, new: bytes, compress: Callable,
+             preview: str, timestamp: float) -> DeltaMemento:
+        limit = min(len(old), len(new))
+        prefix = _common_length(old, new, limit, from_end=False)
+        suffix = _common_length(old, new, limit - prefix, from_end=True)
+
+        middle = new[prefix:len(new) - suffix]
+        return cls(prefix, suffix, compress(middle), preview, timestamp)
+
+    def apply(self, previous: Optional[bytes], decompress: Callable) -> bytes:
+        middle = decompress(self._payload)
+        tail = previous[len(previous) - self._suffix:] if self._suffix else b""
+        return previous[:self._prefix] + middle + tail
+
+    def size(self) -> int:
+        # two ints on top of the payload
+        return len(self._payload) + 16
+
+
+class Caretaker:
+    """
+    The Caretaker keeps a full snapshot every `snapshot_every` backups and
+    deltas in between. Once the stored payloads exceed `memory_budget` bytes
+    the oldest mementos are evicted.
+    """
+
+    def __init__(
+        self,
+        originator: Originator,
+        snapshot_every: int = 16,
+        compression: Optional[str] = "zlib",
+        memory_budget: int = 1 << 20,
+    ) -> None:
+        if compression not in CODECS:
+            raise ValueError(f"Unknown or unavailable compression: {compression!r}")
+
+        self._originator = originator
+        self._mementos: Deque[SnapshotMemento] = deque()
+        self._compress, self._decompress = CODECS[compression]
+        self._snapshot_every = snapshot_every
+        self._memory_budget = memory_budget
+        self._memory_used = 0
+        self._since_snapshot = 0
+        # state of the newest memento, so backups don't have to rebuild it
+        self._last_state: Optional[bytes] = None
+
+    def backup(self) -> None:
+        print("\nCaretaker: Saving Originator's state...")
+        state = self._originator.save_bytes()
+        preview = state[:9].decode(errors="replace")
+        now = time.time()
+
+        if self._mementos and self._last_state is None:
+            self._last_state = self._materialize(len(self._mementos) - 1)
+
+        if not self._mementos or self._since_snapshot >= self._snapshot_every:
+            memento = SnapshotMemento(self._compress(state), preview, now)
+            self._since_snapshot = 0
+        else:
+            memento = DeltaMemento.diff(self._last_state, state, self._compress, preview, now)
+
+        self._since_snapshot += 1
+        self._mementos.append(memento)
+        self._memory_used += memento.size()
+        self._last_state = state
+        self._evict()
+
+    def undo(self) -> None:
+        while self._mementos:
+            state = self._materialize(len(self._mementos) - 1)
+            memento = self._mementos.pop()
+            self._memory_used -= memento.size()
+            self._last_state = None
+            self._since_snapshot = self._distance_to_snapshot()
+            print(f"Caretaker: Restoring state to: {memento.get_name()}")
+
+            try:
+                self._originator.restore_bytes(state)
+                return
+            except Exception:
+                continue
+
+    def show_history(self) -> None:
+        print("Caretaker: Here's the list of mementos:")
+        for memento in self._mementos:
+            print(memento.get_name())
+
+    @property
+    def memory_used(self) -> int:
+        return self._memory_used
+
+    def _materialize(self, index: int) -> bytes:
+        """
+        Rebuild the state of the memento at `index` by starting at the closest
+        full snapshot before it and applying the deltas in order.
+        """
+
+        start = index
+        while type(self._mementos[start]) is not SnapshotMemento:
+            start -= 1
+
+        state = None
+        for i in range(start, index + 1):
+            state = self._mementos[i].apply(state, self._decompress)
+
+        return state
+
+    def _distance_to_snapshot(self) -> int:
+        distance = 0
+        for memento in reversed(self._mementos):
+            distance += 1
+            if type(memento) is SnapshotMemento:
+                break
+
+        return distance
+
+    def _evict(self) -> None:
+        while self._memory_used > self._memory_budget and len(self._mementos) > 1:
+            # The next memento may be a delta against the one being dropped, so
+            # turn it into a full snapshot first.
+            following = self._mementos[1]
+            if type(following) is not SnapshotMemento:
+                state = self._materialize(1)
+                rebased = SnapshotMemento(
+                    self._compress(state), following._preview, following._timestamp
+                )
+                self._mementos[1] = rebased
+                self._memory_used += rebased.size() - following.size()
+
+            self._memory_used -= self._mementos.popleft().size()
+
+
+if __name__ == "__main__":
+    originator = Originator("Super-duper-super-puper-super.")
+    caretaker = Caretaker(originator, snapshot_every=2)
+
+    caretaker.backup()
+    originator.do_something()
+
+    caretaker.backup()
+    originator.do_something()
+
+    caretaker.backup()
+    originator.do_something()
+
+    print()
+    caretaker.show_history()
+
+    print("\nClient: Now, let's rollback!\n")
+    caretaker.undo()
+
+    print("\nClient: Once more!\n")
+    caretaker.undo()
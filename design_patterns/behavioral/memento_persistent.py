@@ -0,0 +1,409 @@
+"""
+A copy-on-write variant of the Memento pattern.
+
+The Originator keeps its state in a persistent (immutable, structurally
+shared) hash array mapped trie. Every change returns a new map that shares all
+untouched subtrees with the old one, so taking a snapshot is just keeping a
+reference to the current root: `save()` and `restore()` are both O(1), and N
+snapshots of a large state cost O(N * log32(size)) memory instead of
+O(N * size).
+
+>> uv run python design_patterns/behavioral/memento_persistent.py
+"""
+
+from __future__ import annotations
+import contextlib
+import copy
+import timeit
+import tracemalloc
+from abc import ABC, abstractmethod
+from collections.abc import Mapping
+from datetime import datetime
+from random import choice, randrange
+from typing import Any, Hashable, Iterator, Optional, Sequence, Tuple
+
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+_HASH_MASK = 0xFFFFFFFF
+_MISSING = object()
+
+
+def _hash(key: Hashable) -> int:
+    return hash(key) & _HASH_MASK
+
+
+class _BitmapNode:
+    """
+    An inner trie node. Only the slots that are in use are stored: `bitmap`
+    says which of the 32 slots exist and `entries` holds them in order. An
+    entry is either a `(key, value)` pair or a child node.
+    """
+
+    __slots__ = ("bitmap", "entries")
+
+    def __init__(self, bitmap: int, entries: Tuple) -> None:
+        self.bitmap = bitmap
+        self.entries = entries
+
+    def get(self, h: int, shift: int, key: Hashable) -> Any:
+        bit = 1 << ((h >> shift) & _MASK)
+        if not self.bitmap & bit:
+            return _MISSING
+
+        entry = self.entries[(self.bitmap & (bit - 1)).bit_count()]
+        if type(entry) is not tuple:
+            return entry.get(h, shift + _BITS, key)
+
+        return entry[1] if entry[0] == key else _MISSING
+
+    def set(self, h: int, shift: int, key: Hashable, value: Any) -> Tuple[_BitmapNode, bool]:
+        bit = 1 << ((h >> shift) & _MASK)
+        index = (self.bitmap & (bit - 1)).bit_count()
+        entries = self.entries
+
+        if not self.bitmap & bit:
+            new_entries = entries[:index] + ((key, value),) + entries[index:]
+            return _BitmapNode(self.bitmap | bit, new_entries), True
+
+        entry = entries[index]
+        if type(entry) is not tuple:
+            child, added = entry.set(h, shift + _BITS, key, value)
+            if child is entry:
+                return self, False
+            replacement = child
+        elif entry[0] == key:
+            if entry[1] is value:
+                return self, False
+            replacement, added = (key, value), False
+        else:
+            old_key, old_value = entry
+            replacement = _merge(old_key, _hash(old_key), old_value, key, h, value, shift + _BITS)
+            added = True
+
+        new_entries = entries[:index] + (replacement,) + entries[index + 1:]
+        return _BitmapNode(self.bitmap, new_entries), added
+
+    def delete(self, h: int, shift: int, key: Hashable) -> Tuple[Optional[_BitmapNode], bool]:
+        bit = 1 << ((h >> shift) & _MASK)
+        if not self.bitmap & bit:
+            return self, False
+
+        index = (self.bitmap & (bit - 1)).bit_count()
+        entries = self.entries
+        entry = entries[index]
+
+        if type(entry) is not tuple:
+            child, removed = entry.delete(h, shift + _BITS, key)
+            if not removed:
+                return self, False
+            if child is not None:
+                new_entries = entries[:index] + (child,) + entries[index + 1:]
+                return _BitmapNode(self.bitmap, new_entries), True
+        elif entry[0] != key:
+            return self, False
+
+        bitmap = self.bitmap & ~bit
+        if not bitmap:
+            return None, True
+
+        return _BitmapNode(bitmap, entries[:index] + entries[index + 1:]), True
+
+    def __iter__(self) -> Iterator[Tuple[Hashable, Any]]:
+        stack = [self]
+        while stack:
+            for entry in stack.pop().entries:
+                if type(entry) is tuple:
+                    yield entry
+                else:
+                    stack.append(entry)
+
+
+class _CollisionNode(_BitmapNode):
+    """
+    Keys whose 32-bit hashes are identical end up here once all the hash bits
+    have been used up. Lookups are linear, which is fine since this is rare.
+    """
+
+    __slots__ = ()
+
+    def get(self, h: int, shift: int, key: Hashable) -> Any:
+        for k, v in self.entries:
+            if k == key:
+                return v
+        return _MISSING
+
+    def set(self, h: int, shift: int, key: Hashable, value: Any) -> Tuple[_BitmapNode, bool]:
+        for i, (k, v) in enumerate(self.entries):
+            if k == key:
+                if v is value:
+                    return self, False
+                entries = self.entries[:i] + ((key, value),) + self.entries[i + 1:]
+                return _CollisionNode(self.bitmap, entries), False
+
+        return _CollisionNode(self.bitmap, self.entries + ((key, value),)), True
+
+    def delete(self, h: int, shift: int, key: Hashable) -> Tuple[Optional[_BitmapNode], bool]:
+        entries = tuple(pair for pair in self.entries if pair[0] != key)
+        if len(entries) == len(self.entries):
+            return self, False
+
+        return (_CollisionNode(self.bitmap, entries) if entries else None), True
+
+
+def _merge(key1, h1, value1, key2, h2, value2, shift) -> _BitmapNode:
+    if h1 == h2:
+        return _CollisionNode(h1, ((key1, value1), (key2, value2)))
+
+    index1 = (h1 >> shift) & _MASK
+    index2 = (h2 >> shift) & _MASK
+
+    if index1 == index2:
+        child = _merge(key1, h1, value1, key2, h2, value2, shift + _BITS)
+        return _BitmapNode(1 << index1, (child,))
+
+    entries = ((key1, value1), (key2, value2))
+    if index1 > index2:
+        entries = entries[::-1]
+
+    return _BitmapNode((1 << index1) | (1 << index2), entries)
+
+
+_EMPTY_NODE = _BitmapNode(0, ())
+
+
+class PersistentMap(Mapping):
+    """
+    An immutable mapping. `set` and `delete` return a new map and leave the
+    original untouched; both maps share every node that didn't change.
+    """
+
+    __slots__ = ("_root", "_size")
+
+    def __init__(self, items: Any = ()) -> None:
+        self._root = _EMPTY_NODE
+        self._size = 0
+
+        pairs = items.items() if isinstance(items, Mapping) else items
+        for key, value in pairs:
+            self._root, added = self._root.set(_hash(key), 0, key, value)
+            self._size += added
+
+    @classmethod
+    def _make(cls, root: _BitmapNode, size: int) -> PersistentMap:
+        new = cls.__new__(cls)
+        new._root = root
+        new._size = size
+        return new
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self._root.get(_hash(key), 0, key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self) -> Iterator[Hashable]:
+        for key, _ in self._root:
+            yield key
+
+    def __len__(self) -> int:
+        return self._size
+
+    def items(self) -> Iterator[Tuple[Hashable, Any]]:
+        return iter(self._root)
+
+    def set(self, key: Hashable, value: Any) -> PersistentMap:
+        root, added = self._root.set(_hash(key), 0, key, value)
+        if root is self._root:
+            return self
+        return self._make(root, self._size + added)
+
+    def delete(self, key: Hashable) -> PersistentMap:
+        root, removed = self._root.delete(_hash(key), 0, key)
+        if not removed:
+            raise KeyError(key)
+        return self._make(root or _EMPTY_NODE, self._size - 1)
+
+    def set_in(self, path: Sequence[Hashable], value: Any) -> PersistentMap:
+        """
+        Update a value inside nested maps, copying only the maps on the path.
+        """
+
+        if len(path) == 1:
+            return self.set(path[0], value)
+
+        head = path[0]
+        child = self.get(head, PersistentMap())
+        return self.set(head, child.set_in(path[1:], value))
+
+    def __repr__(self) -> str:
+        return f"PersistentMap({dict(self.items())!r})"
+
+
+def freeze(value: Any) -> Any:
+    """
+    Convert nested dicts into nested PersistentMaps.
+    """
+
+    if isinstance(value, dict):
+        return PersistentMap((k, freeze(v)) for k, v in value.items())
+    return value
+
+
+class Originator:
+    """
+    The Originator's state is a (possibly nested) PersistentMap. Changing it
+    means replacing `_state` with an updated map, never mutating it in place.
+    """
+
+    _state: PersistentMap = None
+
+    def __init__(self, state: dict) -> None:
+        self._state = freeze(state)
+        print(f"Originator: My initial state has {len(self._state)} sections.")
+
+    def do_something(self) -> None:
+        print("Originator: I'm doing something important.")
+        section = choice(list(self._state))
+        field = choice(list(self._state[section]))
+        self._state = self._state.set_in((section, field), randrange(1000))
+        print(f"Originator: and {section}.{field} changed to: {self._state[section][field]}")
+
+    def save(self) -> Memento:
+        return ConcreteMemento(self._state)
+
+    def restore(self, memento: Memento) -> None:
+        self._state = memento.get_state()
+        print("Originator: My state has been restored.")
+
+
+class Memento(ABC):
+    @abstractmethod
+    def get_name(self) -> str:
+        pass
+
+    @abstractmethod
+    def get_date(self) -> str:
+        pass
+
+
+class ConcreteMemento(Memento):
+    def __init__(self, state: PersistentMap) -> None:
+        # no copy needed, nobody can change the map under us
+        self._state = state
+        self._date = str(datetime.now())[:19]
+
+    def get_state(self) -> PersistentMap:
+        return self._state
+
+    def get_name(self) -> str:
+        return f"{self._date} / ({len(self._state)} sections)"
+
+    def get_date(self) -> str:
+        return self._date
+
+
+class Caretaker:
+    def __init__(self, originator: Originator) -> None:
+        self._mementos = []
+        self._originator = originator
+
+    def backup(self) -> None:
+        print("\nCaretaker: Saving Originator's state...")
+        self._mementos.append(self._originator.save())
+
+    def undo(self) -> None:
+        if not len(self._mementos):
+            return
+
+        memento = self._mementos.pop()
+        print(f"Caretaker: Restoring state to: {memento.get_name()}")
+        self._originator.restore(memento)
+
+    def show_history(self) -> None:
+        print("Caretaker: Here's the list of mementos:")
+        for memento in self._mementos:
+            print(memento.get_name())
+
+
+def benchmark(sections: int = 100, fields: int = 1000, snapshots: int = 20) -> None:
+    """
+    Compare taking `snapshots` snapshots of a large nested state (one field
+    changes between snapshots) with persistent maps versus copy.deepcopy.
+    """
+
+    plain = {f"s{i}": {f"f{j}": j for j in range(fields)} for i in range(sections)}
+    frozen = freeze(plain)
+    edits = [(f"s{randrange(sections)}", f"f{randrange(fields)}") for _ in range(snapshots)]
+
+    # Originator prints on every restore: with sys.stdout set to None, print does nothing
+    quiet = contextlib.redirect_stdout(None)
+    with quiet:
+        originator = Originator(plain)
+
+    def run_deepcopy():
+        state, history = copy.deepcopy(plain), []
+        for i, (section, field) in enumerate(edits):
+            history.append(copy.deepcopy(state))
+            state[section][field] = i
+        return history
+
+    def restore_deepcopy(history):
+        # the snapshot has to be copied again, or editing the restored state
+        # would change the history
+        return copy.deepcopy(history[len(history) // 2])
+
+    def run_persistent():
+        originator.restore(ConcreteMemento(frozen))
+        history = []
+        for i, (section, field) in enumerate(edits):
+            history.append(originator.save())
+            originator._state = originator._state.set_in((section, field), i)
+        return history
+
+    def restore_persistent(history):
+        originator.restore(history[len(history) // 2])
+
+    for name, run, restore in (
+        ("deepcopy", run_deepcopy, restore_deepcopy),
+        ("persistent", run_persistent, restore_persistent),
+    ):
+        with quiet:
+            seconds = timeit.timeit(run, number=1)
+
+            tracemalloc.start()
+            history = run()
+            memory, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            number, total = timeit.Timer(lambda: restore(history)).autorange()
+            del history
+
+        print(
+            f"{name:>10}: save {seconds / snapshots * 1e6:10.1f} us/snapshot, "
+            f"restore {total / number * 1e6:10.1f} us, history {memory / 2**20:8.1f} MiB"
+        )
+
+if __name__ == "__main__":
+    originator = Originator({
+        "user": {"name": "Super-duper", "age": 30},
+        "settings": {"theme": "dark", "volume": 7},
+    })
+    caretaker = Caretaker(originator)
+
+    caretaker.backup()
+    originator.do_something()
+
+    caretaker.backup()
+    originator.do_something()
+
+    print()
+    caretaker.show_history()
+
+    print("\nClient: Now, let's rollback!\n")
+    caretaker.undo()
+
+    print("\nClient: Once more!\n")
+    caretaker.undo()
+
+    print("\nBenchmark: 20 snapshots of a 100 x 1000 nested state")
+    benchmark()
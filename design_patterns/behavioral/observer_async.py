@@ -0,0 +1,238 @@
+"""
+A non-blocking variant of the Observer pattern.
+
+- every subject has its own subscriber table, holding weak references so a
+  forgotten observer doesn't stay alive just because it was attached
+- observers may declare the states they care about (`interested_in`); the
+  subject caches, per state value, which observers can match, so the others
+  are never woken up. The cache keeps the `max_states` most recently notified
+  states
+- detach is O(1) per cached state the observer matches; attach checks the
+  observer's predicate against the cached states
+- delivery happens on a thread pool. If an observer is still busy when new
+  notifications arrive they are coalesced and it only sees the latest state,
+  so a slow observer can't stall `some_business_logic` or the other observers
+"""
+
+from __future__ import annotations
+import itertools
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from random import randrange
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+
+class Observer(ABC):
+    # None means "wake me up for every state"
+    interested_in: Optional[Callable[[Any], bool]] = None
+
+    @abstractmethod
+    def update(self, subject: Subject, state: Any) -> None:
+        pass
+
+
+class Subject(ABC):
+    @abstractmethod
+    def attach(self, observer: Observer) -> None:
+        pass
+
+    @abstractmethod
+    def detach(self, observer: Observer) -> None:
+        pass
+
+    @abstractmethod
+    def notify(self) -> None:
+        pass
+
+
+class ConcreteSubject(Subject):
+    def __init__(self, executor: ThreadPoolExecutor = None, max_states: int = 1024) -> None:
+        self._state: int = None
+        self._executor = executor or ThreadPoolExecutor(thread_name_prefix="observer")
+        self._owns_executor = executor is None
+
+        # every attach is a new subscription, so a detached and re-attached
+        # observer (or a new one that got the same id) starts afresh
+        self._subscriptions = itertools.count()
+        # observer id -> subscription, and back
+        self._keys: Dict[int, int] = {}
+        self._ids: Dict[int, int] = {}
+        # subscription -> weak ref to its observer
+        self._observers: Dict[int, weakref.ref] = {}
+        # state value -> {subscription: weak ref} of the observers whose
+        # predicate matches it, least recently notified state first
+        self._index: "OrderedDict[Any, Dict[int, weakref.ref]]" = OrderedDict()
+        self._max_states = max_states
+        # subscription -> the cached states it is in, so detaching it only
+        # touches those
+        self._matches: Dict[int, Set[Any]] = {}
+
+        # reentrant, because a weakref callback may fire while we hold it
+        self._lock = threading.RLock()
+        # subscription -> (sequence number, latest undelivered state)
+        self._pending: Dict[int, Tuple[int, Any]] = {}
+        self._sequence = 0
+        self._idle = threading.Condition(self._lock)
+        self._running = 0
+
+    def attach(self, observer: Observer) -> None:
+        print("Subject: Attached an observer.")
+        with self._lock:
+            old = self._keys.get(id(observer))
+            if old is not None and self._observers[old]() is observer:
+                return
+            key = self._keys[id(observer)] = next(self._subscriptions)
+            self._ids[key] = id(observer)
+            ref = self._observers[key] = weakref.ref(observer, lambda _: self._forget(key))
+
+            predicate = observer.interested_in
+            matches = self._matches[key] = set()
+            for state, refs in self._index.items():
+                if predicate is None or predicate(state):
+                    refs[key] = ref
+                    matches.add(state)
+
+    def detach(self, observer: Observer) -> None:
+        with self._lock:
+            key = self._keys.get(id(observer))
+            if key is not None and self._observers[key]() is observer:
+                self._forget(key)
+
+    def _forget(self, key: int) -> None:
+        with self._lock:
+            ref = self._observers.pop(key, None)
+            if ref is None:
+                return
+            self._pending.pop(key, None)
+            observer_id = self._ids.pop(key)
+            # the id may already belong to a newer subscription
+            if self._keys.get(observer_id) == key:
+                del self._keys[observer_id]
+            for state in self._matches.pop(key):
+                del self._index[state][key]
+
+    def _interested(self, state: Any) -> Dict[int, weakref.ref]:
+        refs = self._index.get(state)
+        if refs is not None:
+            self._index.move_to_end(state)
+            return refs
+
+        refs = {}
+        for key, ref in list(self._observers.items()):
+            observer = ref()
+            if observer is None:
+                continue
+            predicate = observer.interested_in
+            if predicate is None or predicate(state):
+                refs[key] = ref
+                self._matches[key].add(state)
+        self._index[state] = refs
+
+        while len(self._index) > self._max_states:
+            old_state, old_refs = self._index.popitem(last=False)
+            for key in old_refs:
+                self._matches[key].discard(old_state)
+
+        return refs
+
+    def notify(self) -> None:
+        print("Subject: Notifying observers...")
+        state = self._state
+
+        with self._lock:
+            self._sequence += 1
+            # a snapshot: attach/detach from an observer can't change who gets this one
+            for key, ref in list(self._interested(state).items()):
+                already_scheduled = key in self._pending
+                self._pending[key] = (self._sequence, state)
+                if not already_scheduled:
+                    self._running += 1
+                    self._executor.submit(self._deliver, key, ref)
+
+    def _deliver(self, key: int, ref: weakref.ref) -> None:
+        """
+        Runs on a worker thread. Keeps delivering until there is nothing left
+        pending for this observer, so updates to a single observer stay in
+        order and never run concurrently.
+        """
+
+        while True:
+            with self._lock:
+                if key not in self._pending or key not in self._observers:
+                    self._running -= 1
+                    self._idle.notify_all()
+                    return
+                sequence, state = self._pending[key]
+
+            observer = ref()
+            if observer is not None:
+                try:
+                    observer.update(self, state)
+                except Exception as exc:
+                    print(f"Subject: {type(observer).__name__} failed: {exc!r}")
+
+            with self._lock:
+                # only clear it if nothing newer arrived in the meantime
+                if self._pending.get(key, (None,))[0] == sequence:
+                    del self._pending[key]
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Wait until every pending notification has been delivered.
+        """
+
+        with self._lock:
+            return self._idle.wait_for(lambda: self._running == 0, timeout)
+
+    def close(self) -> None:
+        self.flush()
+        if self._owns_executor:
+            self._executor.shutdown()
+
+    def some_business_logic(self) -> None:
+        print("\nSubject: I'm doing something important.")
+        self._state = randrange(0, 10)
+
+        print(f"Subject: My state has just changed to: {self._state}")
+        self.notify()
+
+
+class ConcreteObserverA(Observer):
+    interested_in = staticmethod(lambda state: state < 3)
+
+    def update(self, subject: Subject, state: int) -> None:
+        print(f"ConcreteObserverA: Reacted to the event ({state})")
+
+
+class ConcreteObserverB(Observer):
+    interested_in = staticmethod(lambda state: state == 0 or state >= 2)
+
+    def update(self, subject: Subject, state: int) -> None:
+        # a slow observer, it no longer holds up the subject
+        time.sleep(0.5)
+        print(f"ConcreteObserverB: Reacted to the event ({state})")
+
+
+if __name__ == "__main__":
+    subject = ConcreteSubject()
+
+    observer_a = ConcreteObserverA()
+    subject.attach(observer_a)
+
+    observer_b = ConcreteObserverB()
+    subject.attach(observer_b)
+
+    start = time.perf_counter()
+    subject.some_business_logic()
+    subject.some_business_logic()
+
+    subject.detach(observer_a)
+
+    subject.some_business_logic()
+    print(f"\nSubject: business logic took {time.perf_counter() - start:.3f}s")
+
+    subject.close()
@@ -0,0 +1,221 @@
+"""
+A table-driven variant of the State pattern.
+
+States and transitions are declared once and compiled into integer-indexed
+tables. A Context then only stores the index of its current state, state
+objects are singletons owned by the machine, and handling an event is a single
+table lookup. Because a state is just an integer, a whole population of
+contexts can also be kept in a NumPy array and stepped at once.
+
+>> uv run python design_patterns/behavioral/state_table.py
+"""
+
+from __future__ import annotations
+import operator
+import timeit
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+Action = Callable[["Context"], None]
+
+
+class State:
+    """
+    A state is just a name and its position in the tables. There is exactly one
+    instance per state and machine, shared by every Context.
+    """
+
+    __slots__ = ("name", "index")
+
+    def __init__(self, name: str, index: int) -> None:
+        self.name = name
+        self.index = index
+
+    def __repr__(self) -> str:
+        return f"State({self.name})"
+
+
+class StateMachine:
+    """
+    The builder used to declare states and transitions.
+    """
+
+    def __init__(self) -> None:
+        self._states: List[str] = []
+        self._events: List[str] = []
+        self._transitions: Dict[Tuple[str, str], Tuple[str, Optional[Action]]] = {}
+
+    def state(self, name: str) -> StateMachine:
+        if name not in self._states:
+            self._states.append(name)
+        return self
+
+    def on(self, state: str, event: str, to: str = None, action: Action = None) -> StateMachine:
+        """
+        Handle `event` while in `state`: run `action` and move to `to`. If `to`
+        is omitted the context stays where it is.
+        """
+
+        self.state(state)
+        self.state(to or state)
+        if event not in self._events:
+            self._events.append(event)
+
+        self._transitions[(state, event)] = (to or state, action)
+        return self
+
+    def compile(self) -> CompiledStateMachine:
+        return CompiledStateMachine(self._states, self._events, self._transitions)
+
+
+class CompiledStateMachine:
+    def __init__(
+        self,
+        states: Sequence[str],
+        events: Sequence[str],
+        transitions: Dict[Tuple[str, str], Tuple[str, Optional[Action]]],
+    ) -> None:
+        self.states = tuple(State(name, i) for i, name in enumerate(states))
+        self.state_ids = {name: i for i, name in enumerate(states)}
+        self.event_ids = {name: i for i, name in enumerate(events)}
+
+        # unhandled events leave the state as it is
+        table = np.tile(np.arange(len(states), dtype=np.int32)[:, None], (1, len(events)))
+        actions: List[List[Optional[Action]]] = [[None] * len(events) for _ in states]
+
+        for (state, event), (target, action) in transitions.items():
+            s, e = self.state_ids[state], self.event_ids[event]
+            table[s, e] = self.state_ids[target]
+            actions[s][e] = action
+
+        self.table = table
+        self.table.flags.writeable = False
+        # plain tuples are faster than NumPy for one lookup at a time
+        self._next = tuple(tuple(int(t) for t in row) for row in table)
+        self._actions = tuple(tuple(row) for row in actions)
+
+    def event_id(self, event: Union[str, int]) -> int:
+        if isinstance(event, str):
+            return self.event_ids[event]
+        # accepts NumPy integers too, e.g. an element of an events array
+        return operator.index(event)
+
+    def fire(self, context: Context, event: Union[str, int]) -> None:
+        e = self.event_id(event)
+        s = context.state_id
+
+        action = self._actions[s][e]
+        if action is not None:
+            action(context)
+
+        context.state_id = self._next[s][e]
+
+    def new_population(self, size: int, state: str) -> np.ndarray:
+        """
+        The states of `size` contexts, one small integer per context.
+        """
+
+        dtype = np.int8 if len(self.states) < 128 else np.int32
+        return np.full(size, self.state_ids[state], dtype=dtype)
+
+    def step(self, states: np.ndarray, events: Union[str, int, np.ndarray]) -> np.ndarray:
+        """
+        Apply one event per context (or the same event to every context) in a
+        single vectorised lookup. Actions are not run in batch mode, this is
+        for machines whose behaviour is captured entirely by their transitions.
+        """
+
+        if not isinstance(events, np.ndarray):
+            events = self.event_id(events)
+
+        states[:] = self.table[states, events]
+        return states
+
+
+class Context:
+    """
+    The Context only remembers which state it is in. All behaviour lives in
+    the machine, which is shared by every Context.
+    """
+
+    __slots__ = ("machine", "state_id")
+
+    def __init__(self, machine: CompiledStateMachine, state: str) -> None:
+        self.machine = machine
+        self.state_id = machine.state_ids[state]
+
+    @property
+    def state(self) -> State:
+        return self.machine.states[self.state_id]
+
+    def request1(self) -> None:
+        self.machine.fire(self, "request1")
+
+    def request2(self) -> None:
+        self.machine.fire(self, "request2")
+
+
+def say(message: str) -> Action:
+    return lambda context: print(message)
+
+
+DEMO_MACHINE = (
+    StateMachine()
+    .on("ConcreteStateA", "request1", to="ConcreteStateB",
+        action=say("ConcreteStateA handles request1."))
+    .on("ConcreteStateA", "request2", action=say("ConcreteStateA handles request2."))
+    .on("ConcreteStateB", "request1", action=say("ConcreteStateB handles request1."))
+    .on("ConcreteStateB", "request2", to="ConcreteStateA",
+        action=say("ConcreteStateB handles request2."))
+    .compile()
+)
+
+# the same machine without the printing, for the benchmark
+QUIET_MACHINE = (
+    StateMachine()
+    .on("ConcreteStateA", "request1", to="ConcreteStateB")
+    .on("ConcreteStateB", "request2", to="ConcreteStateA")
+    .compile()
+)
+
+
+def benchmark(size: int = 1_000_000) -> None:
+    rng = np.random.default_rng(0)
+    events = rng.integers(0, 2, size=size).astype(np.int8)
+    event_list = events.tolist()
+
+    contexts = [Context(QUIET_MACHINE, "ConcreteStateA") for _ in range(size)]
+
+    def run_objects():
+        fire = QUIET_MACHINE.fire
+        for context, event in zip(contexts, event_list):
+            fire(context, event)
+
+    population = QUIET_MACHINE.new_population(size, "ConcreteStateA")
+
+    def run_batch():
+        QUIET_MACHINE.step(population, events)
+
+    objects = timeit.timeit(run_objects, number=3) / 3
+    batch = timeit.timeit(run_batch, number=3) / 3
+
+    print(f"one event for {size:,} contexts:")
+    print(f"  Context objects: {objects * 1e3:8.2f} ms")
+    print(f"  NumPy batch:     {batch * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    context = Context(DEMO_MACHINE, "ConcreteStateA")
+    context.request1()
+    print(f"Context: now in {context.state.name}")
+    context.request2()
+    print(f"Context: now in {context.state.name}")
+    print()
+
+    # events can also be given by id, as a Python or NumPy integer
+    quiet = Context(QUIET_MACHINE, "ConcreteStateA")
+    QUIET_MACHINE.fire(quiet, np.int64(QUIET_MACHINE.event_ids["request1"]))
+    assert quiet.state.name == "ConcreteStateB"
+
+    benchmark()
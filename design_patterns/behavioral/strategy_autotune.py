@@ -0,0 +1,230 @@
+"""
+An autotuning variant of the Strategy pattern.
+
+Instead of being handed one Strategy, the Context is handed several strategies
+that do the same job. It times them on the real inputs it receives, grouped
+into buckets by input size and element type, and routes each call to the one
+that has been fastest for that bucket. The decision is cached per bucket and
+re-checked every now and then in case the picture changes.
+
+>> uv run python design_patterns/behavioral/strategy_autotune.py
+"""
+
+from __future__ import annotations
+import heapq
+import random
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, List, Optional
+
+
+class Strategy(ABC):
+    """
+    The Strategy interface declares operations common to all supported versions
+    of some algorithm. `supports` lets a strategy opt out of inputs it can't
+    handle at all.
+    """
+
+    @abstractmethod
+    def do_algorithm(self, data: List) -> List:
+        pass
+
+    def supports(self, data: List) -> bool:
+        return True
+
+    @property
+    def name(self) -> str:
+        return type(self).__name__
+
+
+class BuiltinSort(Strategy):
+    def do_algorithm(self, data: List) -> List:
+        return sorted(data)
+
+
+class InsertionSort(Strategy):
+    def do_algorithm(self, data: List) -> List:
+        result = []
+        for item in data:
+            i = len(result)
+            while i and result[i - 1] > item:
+                i -= 1
+            result.insert(i, item)
+        return result
+
+    def supports(self, data: List) -> bool:
+        return len(data) <= 64
+
+
+class HeapSort(Strategy):
+    def do_algorithm(self, data: List) -> List:
+        heap = list(data)
+        heapq.heapify(heap)
+        return [heapq.heappop(heap) for _ in range(len(heap))]
+
+
+class CountingSort(Strategy):
+    """
+    Linear time, but only for small non-negative integers.
+    """
+
+    max_value = 1 << 16
+
+    def do_algorithm(self, data: List) -> List:
+        counts = [0] * (max(data) + 1)
+        for item in data:
+            counts[item] += 1
+
+        result = []
+        for value, count in enumerate(counts):
+            if count:
+                result.extend([value] * count)
+        return result
+
+    def supports(self, data: List) -> bool:
+        return (
+            bool(data)
+            and type(data[0]) is int
+            and all(type(item) is int and 0 <= item < self.max_value for item in data)
+        )
+
+
+@dataclass
+class StrategyStats:
+    calls: int = 0
+    # exponentially weighted moving average of the run time
+    mean_ns: float = 0.0
+
+    def record(self, elapsed_ns: int, weight: float) -> None:
+        self.calls += 1
+        if self.calls == 1:
+            self.mean_ns = elapsed_ns
+        else:
+            self.mean_ns += weight * (elapsed_ns - self.mean_ns)
+
+
+@dataclass
+class Bucket:
+    stats: Dict[str, StrategyStats] = field(default_factory=dict)
+    chosen: Optional[str] = None
+    calls: int = 0
+
+
+class Context:
+    """
+    The Context picks the strategy itself. Each bucket goes through a warm-up
+    phase where every applicable strategy is timed `warmup` times, after which
+    calls go to the fastest one. Every `explore_every` calls one call is routed
+    to a random other strategy so that the measurements stay current.
+    """
+
+    def __init__(
+        self,
+        strategies: List[Strategy],
+        warmup: int = 3,
+        explore_every: int = 100,
+        weight: float = 0.2,
+    ) -> None:
+        self._strategies = {strategy.name: strategy for strategy in strategies}
+        self._buckets: Dict[Hashable, Bucket] = {}
+        self._warmup = warmup
+        self._explore_every = explore_every
+        self._weight = weight
+
+    def register(self, strategy: Strategy) -> None:
+        self._strategies[strategy.name] = strategy
+        # a newcomer deserves a chance everywhere
+        for bucket in self._buckets.values():
+            bucket.chosen = None
+
+    @staticmethod
+    def bucket_key(data: List) -> Hashable:
+        """
+        Inputs of the same element type and the same order of magnitude in
+        size land in the same bucket.
+        """
+
+        return len(data).bit_length(), type(data[0]).__name__ if data else None
+
+    def do_some_business_logic(self, data: List) -> List:
+        bucket = self._buckets.setdefault(self.bucket_key(data), Bucket())
+        bucket.calls += 1
+
+        name = self._route(bucket, data)
+        strategy = self._strategies[name]
+
+        start = time.perf_counter_ns()
+        result = strategy.do_algorithm(data)
+        elapsed = time.perf_counter_ns() - start
+
+        bucket.stats.setdefault(name, StrategyStats()).record(elapsed, self._weight)
+        if bucket.chosen is not None and name != bucket.chosen:
+            self._choose(bucket)
+
+        return result
+
+    def _route(self, bucket: Bucket, data: List) -> str:
+        chosen = bucket.chosen
+        if chosen is not None and not self._strategies[chosen].supports(data):
+            # an odd input in this bucket, fall back to the best one that fits
+            candidates = self._candidates(data)
+            measured = [name for name in candidates if name in bucket.stats]
+            if not measured:
+                return candidates[0]
+            return min(measured, key=lambda name: bucket.stats[name].mean_ns)
+
+        if chosen is not None:
+            if bucket.calls % self._explore_every:
+                return chosen
+
+            others = [name for name in self._candidates(data) if name != chosen]
+            return random.choice(others) if others else chosen
+
+        candidates = self._candidates(data)
+        for name in candidates:
+            stats = bucket.stats.get(name)
+            if stats is None or stats.calls < self._warmup:
+                return name
+
+        self._choose(bucket, candidates)
+        return bucket.chosen
+
+    def _candidates(self, data: List) -> List[str]:
+        return [name for name, strategy in self._strategies.items() if strategy.supports(data)]
+
+    @staticmethod
+    def _choose(bucket: Bucket, candidates: List[str] = None) -> None:
+        names = candidates if candidates is not None else list(bucket.stats)
+        bucket.chosen = min(names, key=lambda name: bucket.stats[name].mean_ns)
+
+    def metrics(self) -> Dict[Hashable, Dict]:
+        return {
+            key: {
+                "chosen": bucket.chosen,
+                "calls": bucket.calls,
+                "mean_us": {
+                    name: round(stats.mean_ns / 1e3, 2) for name, stats in bucket.stats.items()
+                },
+            }
+            for key, bucket in self._buckets.items()
+        }
+
+
+if __name__ == "__main__":
+    context = Context([BuiltinSort(), InsertionSort(), HeapSort(), CountingSort()])
+
+    workloads = {
+        "short words": lambda: random.choices(["a", "b", "c", "d", "e"], k=5),
+        "small ints": lambda: [random.randrange(100) for _ in range(10_000)],
+        "large floats": lambda: [random.random() for _ in range(5_000)],
+    }
+
+    for _ in range(200):
+        for make_input in workloads.values():
+            data = make_input()
+            assert context.do_some_business_logic(data) == sorted(data)
+
+    print("Client: the context picked these strategies on its own:")
+    for key, metrics in context.metrics().items():
+        print(f"{key}: {metrics}")
@@ -0,0 +1,252 @@
+"""
+A concurrent variant of the Template Method pattern.
+
+The abstract class still owns the skeleton of the algorithm, but instead of a
+fixed sequence of calls each step declares which other steps it depends on.
+The template runner turns that into a DAG and runs every step as soon as its
+dependencies are done, so independent (I/O-heavy) steps overlap. Hooks that a
+subclass didn't override are dropped from the plan entirely, and each step's
+wall-clock time is recorded.
+
+>> uv run python design_patterns/behavioral/template_method_dag.py
+"""
+
+from __future__ import annotations
+import asyncio
+import inspect
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Tuple
+
+Steps = Dict[str, Tuple[str, ...]]
+
+
+def after(*dependencies: str) -> Callable:
+    """
+    Declare which steps have to finish before the decorated step can start.
+    """
+
+    def decorate(method: Callable) -> Callable:
+        method.__depends_on__ = dependencies
+        return method
+
+    return decorate
+
+
+def hook(method: Callable) -> Callable:
+    """
+    Mark a default (empty) hook implementation. Unless a subclass overrides
+    it, the step is left out of the plan.
+    """
+
+    method.__is_default_hook__ = True
+    return method
+
+
+class AbstractClass(ABC):
+    """
+    The Abstract Class defines a template method that contains a skeleton of
+    some algorithm. The skeleton is the set of steps below plus their
+    dependencies, in the order they'd run sequentially.
+    """
+
+    steps: Tuple[str, ...] = (
+        "base_operation1",
+        "required_operations1",
+        "base_operation2",
+        "hook1",
+        "required_operations2",
+        "base_operation3",
+        "hook2",
+    )
+
+    # plans are worked out once per class
+    _plans: Dict[type, Steps] = {}
+
+    def __init__(self) -> None:
+        self.timings: Dict[str, float] = {}
+
+    @classmethod
+    def plan(cls) -> Steps:
+        """
+        Map every step that actually does something to the steps it waits for.
+        Dependencies on skipped hooks are replaced by the hook's own
+        dependencies, so the ordering is preserved.
+        """
+
+        plan = AbstractClass._plans.get(cls)
+        if plan is not None:
+            return plan
+
+        declared = {}
+        for name in cls.steps:
+            method = getattr(cls, name)
+            declared[name] = getattr(method, "__depends_on__", ())
+
+        for name, dependencies in declared.items():
+            for dependency in dependencies:
+                if dependency not in declared:
+                    raise ValueError(f"{cls.__name__}.{name} depends on an unknown step: {dependency!r}")
+
+        def resolve(name: str, path: Tuple[str, ...] = ()) -> Tuple[str, ...]:
+            if name in path:
+                raise ValueError(f"Steps depend on each other in a cycle: {sorted(path)}")
+            resolved = []
+            for dependency in declared[name]:
+                if getattr(getattr(cls, dependency), "__is_default_hook__", False):
+                    resolved.extend(resolve(dependency, path + (name,)))
+                else:
+                    resolved.append(dependency)
+            return tuple(dict.fromkeys(resolved))
+
+        plan = {
+            name: resolve(name)
+            for name in cls.steps
+            if not getattr(getattr(cls, name), "__is_default_hook__", False)
+        }
+
+        cls._check_acyclic(plan)
+        AbstractClass._plans[cls] = plan
+        return plan
+
+    @staticmethod
+    def _check_acyclic(plan: Steps) -> None:
+        done = set()
+        remaining = dict(plan)
+        while remaining:
+            ready = [name for name, deps in remaining.items() if done.issuperset(deps)]
+            if not ready:
+                raise ValueError(f"Steps depend on each other in a cycle: {sorted(remaining)}")
+            for name in ready:
+                done.add(name)
+                del remaining[name]
+
+    async def template_method(self) -> None:
+        """
+        The template method defines the skeleton of an algorithm. Synchronous
+        steps run on the default thread pool, coroutine steps on the loop.
+
+        If a step raises, the steps still running are cancelled and the errors
+        are raised together as an ExceptionGroup. (A synchronous step that
+        already started on a thread runs to the end, but nothing waits for it.)
+        """
+
+        plan = self.plan()
+        loop = asyncio.get_running_loop()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run(name: str) -> None:
+            dependencies = [tasks[dependency] for dependency in plan[name]]
+            if dependencies:
+                await asyncio.wait(dependencies)
+                if any(task.cancelled() or task.exception() for task in dependencies):
+                    # the failed step reports it, the group cancels the rest
+                    return
+
+            method = getattr(self, name)
+            start = time.perf_counter()
+            if inspect.iscoroutinefunction(method):
+                await method()
+            else:
+                await loop.run_in_executor(None, method)
+            self.timings[name] = time.perf_counter() - start
+
+        async with asyncio.TaskGroup() as group:
+            # none of the tasks starts before we yield, so by the time one looks
+            # up its dependencies they all exist
+            for name in plan:
+                tasks[name] = group.create_task(run(name))
+
+    # These operations already have implementations.
+
+    def base_operation1(self) -> None:
+        print("AbstractClass says: I am doing the bulk of the work")
+
+    @after("base_operation1")
+    def base_operation2(self) -> None:
+        print("AbstractClass says: But I let subclasses override some operations")
+
+    @after("required_operations1", "required_operations2", "hook1")
+    def base_operation3(self) -> None:
+        print("AbstractClass says: But I am doing the bulk of the work anyway")
+
+    # These operations have to be implemented in subclasses.
+
+    @abstractmethod
+    def required_operations1(self) -> None:
+        pass
+
+    @abstractmethod
+    def required_operations2(self) -> None:
+        pass
+
+    # These are "hooks." Subclasses may override them, but it's not mandatory.
+    # Hooks left alone cost nothing, they are not part of the plan.
+
+    @hook
+    @after("base_operation2")
+    def hook1(self) -> None:
+        pass
+
+    @hook
+    @after("base_operation3")
+    def hook2(self) -> None:
+        pass
+
+
+class ConcreteClass1(AbstractClass):
+    """
+    Concrete classes implement the abstract steps and declare their
+    dependencies with `@after`. Without any, a step can start right away.
+    """
+
+    @after("base_operation1")
+    async def required_operations1(self) -> None:
+        await asyncio.sleep(0.2)
+        print("ConcreteClass1 says: Implemented Operation1")
+
+    @after("base_operation1")
+    async def required_operations2(self) -> None:
+        await asyncio.sleep(0.2)
+        print("ConcreteClass1 says: Implemented Operation2")
+
+
+class ConcreteClass2(AbstractClass):
+    @after("base_operation1")
+    def required_operations1(self) -> None:
+        time.sleep(0.2)
+        print("ConcreteClass2 says: Implemented Operation1")
+
+    @after("base_operation2")
+    def required_operations2(self) -> None:
+        time.sleep(0.2)
+        print("ConcreteClass2 says: Implemented Operation2")
+
+    # overriding a hook drops the @hook marker, but the dependencies have to
+    # be declared again
+    @after("base_operation2")
+    def hook1(self) -> None:
+        time.sleep(0.2)
+        print("ConcreteClass2 says: Overridden Hook1")
+
+
+def client_code(abstract_class: AbstractClass) -> None:
+    """
+    The client code calls the template method to execute the algorithm.
+    """
+
+    start = time.perf_counter()
+    asyncio.run(abstract_class.template_method())
+    total = time.perf_counter() - start
+
+    steps = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in abstract_class.timings.items())
+    print(f"Client: took {total:.2f}s ({steps})")
+
+
+if __name__ == "__main__":
+    print("Same client code can work with different subclasses:")
+    client_code(ConcreteClass1())
+    print("")
+
+    print("Same client code can work with different subclasses:")
+    client_code(ConcreteClass2())
@@ -0,0 +1,180 @@
+"""
+A faster way to drive the Visitor pattern over lots of components.
+
+Instead of asking every component to `accept` the visitor (two dynamic calls
+per element), the dispatcher keeps a table per visitor class that maps a
+component class to the visitor's method for it. The table is filled on first
+use, so after that visiting an element is one dict lookup and one call.
+
+Batch visiting goes further: components are grouped by class and handed over
+as a list to `visit_many_<component>` when the visitor defines it, letting the
+visitor process a whole group at once.
+
+>> uv run python design_patterns/behavioral/visitor_dispatch.py
+"""
+
+from __future__ import annotations
+import re
+import timeit
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class Component(ABC):
+    @abstractmethod
+    def accept(self, visitor: Visitor) -> None:
+        pass
+
+
+class ConcreteComponentA(Component):
+    def accept(self, visitor: Visitor) -> None:
+        visitor.visit_concrete_component_a(self)
+
+    def exclusive_method_of_concrete_component_a(self) -> str:
+        return "A"
+
+
+class ConcreteComponentB(Component):
+    def accept(self, visitor: Visitor):
+        visitor.visit_concrete_component_b(self)
+
+    def special_method_of_concrete_component_b(self) -> str:
+        return "B"
+
+
+class Visitor(ABC):
+    @abstractmethod
+    def visit_concrete_component_a(self, element: ConcreteComponentA) -> None:
+        pass
+
+    @abstractmethod
+    def visit_concrete_component_b(self, element: ConcreteComponentB) -> None:
+        pass
+
+
+class ConcreteVisitor1(Visitor):
+    def visit_concrete_component_a(self, element) -> None:
+        print(f"{element.exclusive_method_of_concrete_component_a()} + ConcreteVisitor1")
+
+    def visit_concrete_component_b(self, element) -> None:
+        print(f"{element.special_method_of_concrete_component_b()} + ConcreteVisitor1")
+
+
+class CountingVisitor(Visitor):
+    """
+    Counts the components of each kind. It handles a group of A's in one go.
+    """
+
+    def __init__(self) -> None:
+        self.a = 0
+        self.b = 0
+
+    def visit_concrete_component_a(self, element) -> None:
+        self.a += 1
+
+    def visit_many_concrete_component_a(self, elements: List[ConcreteComponentA]) -> None:
+        self.a += len(elements)
+
+    def visit_concrete_component_b(self, element) -> None:
+        self.b += 1
+
+
+Single = Callable[[Visitor, Component], None]
+Many = Optional[Callable[[Visitor, List[Component]], None]]
+
+_CAMEL_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+# visitor class -> component class -> (visit one, visit many)
+_dispatch_tables: Dict[type, Dict[type, Tuple[Single, Many]]] = {}
+
+
+def _method_suffix(component_class: type) -> str:
+    return _CAMEL_BOUNDARY.sub("_", component_class.__name__).lower()
+
+
+def _resolve(visitor_class: type, component_class: type) -> Tuple[Single, Many]:
+    """
+    Find the visitor methods for a component class, falling back to the
+    methods for its base classes.
+    """
+
+    for klass in component_class.__mro__:
+        suffix = _method_suffix(klass)
+        single = getattr(visitor_class, f"visit_{suffix}", None)
+        if single is not None:
+            return single, getattr(visitor_class, f"visit_many_{suffix}", None)
+
+    raise TypeError(f"{visitor_class.__name__} can't visit {component_class.__name__}")
+
+
+def dispatch_table(visitor_class: type) -> Dict[type, Tuple[Single, Many]]:
+    return _dispatch_tables.setdefault(visitor_class, {})
+
+
+def visit_all(components: Iterable[Component], visitor: Visitor) -> None:
+    """
+    Visit components one by one, in order, without going through `accept`.
+    """
+
+    table = dispatch_table(type(visitor))
+    for component in components:
+        component_class = type(component)
+        entry = table.get(component_class)
+        if entry is None:
+            entry = table[component_class] = _resolve(type(visitor), component_class)
+        entry[0](visitor, component)
+
+
+def visit_batch(components: Iterable[Component], visitor: Visitor) -> None:
+    """
+    Group the components by class and visit each group at once. Components of
+    the same class are visited in order, but groups are not interleaved.
+    """
+
+    groups: Dict[type, List[Component]] = {}
+    for component in components:
+        component_class = type(component)
+        group = groups.get(component_class)
+        if group is None:
+            group = groups[component_class] = []
+        group.append(component)
+
+    table = dispatch_table(type(visitor))
+    for component_class, group in groups.items():
+        entry = table.get(component_class)
+        if entry is None:
+            entry = table[component_class] = _resolve(type(visitor), component_class)
+
+        single, many = entry
+        if many is not None:
+            many(visitor, group)
+        else:
+            for component in group:
+                single(visitor, component)
+
+
+def client_code(components: List[Component], visitor: Visitor) -> None:
+    for component in components:
+        component.accept(visitor)
+
+
+def benchmark(size: int = 1_000_000) -> None:
+    components = [ConcreteComponentA() if i % 3 else ConcreteComponentB() for i in range(size)]
+
+    for name, run in (("accept", client_code), ("visit_all", visit_all), ("visit_batch", visit_batch)):
+        visitor = CountingVisitor()
+        seconds = timeit.timeit(lambda: run(components, visitor), number=3) / 3
+        print(f"{name:>12}: {seconds * 1e3:8.2f} ms for {size:,} components")
+
+
+if __name__ == "__main__":
+    components = [ConcreteComponentA(), ConcreteComponentB()]
+
+    print("The same visitor, dispatched from a cached table:")
+    visit_all(components, ConcreteVisitor1())
+
+    print("Batch visiting falls back to one at a time without visit_many_*:")
+    visit_batch(components, ConcreteVisitor1())
+    print()
+
+    benchmark()
@@ -0,0 +1,267 @@
+"""
+A registry-driven variant of the Abstract Factory pattern.
+
+Instead of one hand-written factory class per product family, families are
+registered by name with the import paths of their products ("module:Class"),
+either in code or through the `design_patterns.product_families` entry point
+group. Nothing is imported at registration time: a product's module is only
+imported the first time that product is created, and the factory for a family
+as well as each product class it resolves are cached.
+
+>> uv run python design_patterns/creational/abstract_factory_registry.py
+"""
+
+import importlib
+import sys
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from importlib.metadata import EntryPoint, entry_points
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+ENTRY_POINT_GROUP = "design_patterns.product_families"
+
+
+class AbstractProductA(ABC):
+    @abstractmethod
+    def business_logic(self) -> str:
+        pass
+
+
+class AbstractProductB(ABC):
+    @abstractmethod
+    def business_logic(self) -> str:
+        pass
+
+    @abstractmethod
+    def another_business_logic(self, collaborator: AbstractProductA) -> str:
+        pass
+
+
+class ConcreteProductA1(AbstractProductA):
+    def business_logic(self) -> str:
+        return "The result of the product A1."
+
+
+class ConcreteProductA2(AbstractProductA):
+    def business_logic(self) -> str:
+        return "The result of the product A2."
+
+
+class ConcreteProductB1(AbstractProductB):
+    def business_logic(self) -> str:
+        return "The result of the product B1."
+
+    def another_business_logic(self, collaborator: AbstractProductA) -> str:
+        result = collaborator.business_logic()
+        return f"The result of the B1 collaborating with the ({result})"
+
+
+class ConcreteProductB2(AbstractProductB):
+    def business_logic(self) -> str:
+        return "The result of the product B2."
+
+    def another_business_logic(self, collaborator: AbstractProductA) -> str:
+        result = collaborator.business_logic()
+        return f"The result of the B2 collaborating with the ({result})"
+
+
+class AbstractFactory(ABC):
+    @abstractmethod
+    def create_product_a(self) -> AbstractProductA:
+        pass
+
+    @abstractmethod
+    def create_product_b(self) -> AbstractProductB:
+        pass
+
+
+def _import(spec: str) -> Any:
+    module_name, _, attribute = spec.partition(":")
+    target = importlib.import_module(module_name)
+    for part in filter(None, attribute.split(".")):
+        target = getattr(target, part)
+    return target
+
+
+class _Family:
+    """
+    Where to find the products of one family. Either every product has its
+    own "module:Class" path, or the family has a single source (an entry point
+    or a "module:attr" path) whose `product_a` / `product_b` attributes are the
+    product classes.
+    """
+
+    def __init__(self, source: Union[str, EntryPoint, None], products: Dict[str, str]) -> None:
+        self._source = source
+        self._products = products
+        self._loaded_source: Any = None
+
+    def product(self, kind: str) -> type:
+        if kind in self._products:
+            return _import(self._products[kind])
+
+        if self._source is None:
+            raise LookupError(f"Family doesn't provide {kind}")
+
+        if self._loaded_source is None:
+            source = self._source
+            self._loaded_source = source.load() if isinstance(source, EntryPoint) else _import(source)
+
+        return getattr(self._loaded_source, kind)
+
+
+class RegistryFactory(AbstractFactory):
+    """
+    A factory for one registered family. Product classes are resolved (and
+    their modules imported) on first use only.
+    """
+
+    def __init__(self, name: str, family: _Family) -> None:
+        self.name = name
+        self._family = family
+        self._classes: Dict[str, type] = {}
+
+    def _create(self, kind: str) -> Any:
+        cls = self._classes.get(kind)
+        if cls is None:
+            cls = self._classes[kind] = self._family.product(kind)
+        return cls()
+
+    def create_product_a(self) -> AbstractProductA:
+        return self._create("product_a")
+
+    def create_product_b(self) -> AbstractProductB:
+        return self._create("product_b")
+
+
+class FactoryRegistry:
+    def __init__(self) -> None:
+        self._families: Dict[str, _Family] = {}
+        self._factories: Dict[str, RegistryFactory] = {}
+
+    def register(self, name: str, source: Optional[str] = None, **products: str) -> None:
+        """
+        register("1", product_a="pkg.a1:ConcreteProductA1", product_b="pkg.b1:ConcreteProductB1")
+        register("2", "pkg.family2")  # a module with product_a / product_b
+        """
+
+        self._families[name] = _Family(source, products)
+        self._factories.pop(name, None)
+
+    def load_entry_points(self, group: str = ENTRY_POINT_GROUP) -> None:
+        """
+        Register every family advertised by installed packages, e.g. in their
+        pyproject.toml:
+
+            [project.entry-points."design_patterns.product_families"]
+            modern = "modern_furniture.family"
+
+        Only the entry point metadata is read, nothing is imported.
+        """
+
+        for entry_point in entry_points(group=group):
+            self._families[entry_point.name] = _Family(entry_point, {})
+
+    def factory(self, name: str) -> RegistryFactory:
+        factory = self._factories.get(name)
+        if factory is None:
+            try:
+                family = self._families[name]
+            except KeyError:
+                raise LookupError(f"No product family registered as {name!r}") from None
+            factory = self._factories[name] = RegistryFactory(name, family)
+        return factory
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._families
+
+    def __len__(self) -> int:
+        return len(self._families)
+
+
+def client_code(factory: AbstractFactory) -> None:
+    product_a = factory.create_product_a()
+    product_b = factory.create_product_b()
+
+    print(f"{product_b.business_logic()}")
+    print(f"{product_b.another_business_logic(product_a)}", end="")
+
+
+FAMILY_TEMPLATE = '''
+import hashlib
+
+# stand-in for the import-time work a real product module does
+_TABLE = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(2000)]
+
+
+class ProductA:
+    def business_logic(self):
+        return "The result of the product A{n}."
+
+
+class ProductB:
+    def business_logic(self):
+        return "The result of the product B{n}."
+
+    def another_business_logic(self, collaborator):
+        return f"The result of the B{n} collaborating with the ({{collaborator.business_logic()}})"
+
+
+product_a = ProductA
+product_b = ProductB
+'''
+
+
+def benchmark(families: int = 150) -> None:
+    """
+    Generate `families` product family modules and compare importing all of
+    them up front with registering them and using just one.
+    """
+
+    with tempfile.TemporaryDirectory() as directory:
+        for n in range(families):
+            Path(directory, f"bench_family_{n}.py").write_text(FAMILY_TEMPLATE.format(n=n))
+
+        sys.path.insert(0, directory)
+        try:
+            start = time.perf_counter()
+            for n in range(families):
+                importlib.import_module(f"bench_family_{n}")
+            eager = time.perf_counter() - start
+
+            for n in range(families):
+                del sys.modules[f"bench_family_{n}"]
+
+            start = time.perf_counter()
+            registry = FactoryRegistry()
+            for n in range(families):
+                registry.register(f"family{n}", f"bench_family_{n}")
+            registry.factory("family7").create_product_b()
+            lazy = time.perf_counter() - start
+        finally:
+            sys.path.remove(directory)
+            for n in range(families):
+                sys.modules.pop(f"bench_family_{n}", None)
+
+    print(f"eager import of {families} families: {eager * 1e3:8.2f} ms")
+    print(f"lazy registry, one family used:  {lazy * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    registry = FactoryRegistry()
+    registry.load_entry_points()
+    registry.register("1", product_a=f"{__name__}:ConcreteProductA1", product_b=f"{__name__}:ConcreteProductB1")
+    registry.register("2", product_a=f"{__name__}:ConcreteProductA2", product_b=f"{__name__}:ConcreteProductB2")
+
+    print("Client: Testing client code with the first factory type:")
+    client_code(registry.factory("1"))
+
+    print("\n")
+
+    print("Client: Testing the same client code with the second factory type:")
+    client_code(registry.factory("2"))
+
+    print("\n")
+    benchmark()
@@ -0,0 +1,268 @@
+"""
+A bulk-building variant of the Builder pattern.
+
+Going through the Director for every product means a fresh Product1, a fresh
+list and one method call per part, every single time. When a batch job needs
+millions of products built from a handful of recipes, we can do better:
+
+- the Director compiles a recipe (e.g. `build_full_featured_product`) once,
+  by replaying it against a recording builder, into a flat tuple of steps
+- the builder turns a compiled recipe into its parts once, too
+- `build_many` then stores a whole batch in columnar form: the distinct part
+  tuples plus one small integer per product saying which one it uses
+
+>> uv run python design_patterns/creational/builder_bulk.py
+"""
+
+import timeit
+from abc import ABC, abstractmethod
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+
+class Product1:
+    __slots__ = ("parts",)
+
+    def __init__(self, parts: Sequence[Any] = ()) -> None:
+        self.parts = list(parts)
+
+    def add(self, part: Any) -> None:
+        self.parts.append(part)
+
+    def list_parts(self) -> None:
+        print(f"Product parts: {', '.join(self.parts)}", end="")
+
+
+class Builder(ABC):
+    @property
+    @abstractmethod
+    def product(self) -> None:
+        pass
+
+    @abstractmethod
+    def produce_part_a(self) -> None:
+        pass
+
+    @abstractmethod
+    def produce_part_b(self) -> None:
+        pass
+
+    @abstractmethod
+    def produce_part_c(self) -> None:
+        pass
+
+
+class CompiledRecipe:
+    """
+    The flat list of builder steps a Director method performs.
+    """
+
+    __slots__ = ("name", "steps")
+
+    def __init__(self, name: str, steps: Tuple[str, ...]) -> None:
+        self.name = name
+        self.steps = steps
+
+    def __repr__(self) -> str:
+        return f"CompiledRecipe({self.name}: {' -> '.join(self.steps)})"
+
+
+class _RecordingBuilder(Builder):
+    """
+    Remembers which steps it was asked to perform instead of building anything.
+    """
+
+    def __init__(self) -> None:
+        self.steps: List[str] = []
+
+    @property
+    def product(self) -> None:
+        return None
+
+    def produce_part_a(self) -> None:
+        self.steps.append("produce_part_a")
+
+    def produce_part_b(self) -> None:
+        self.steps.append("produce_part_b")
+
+    def produce_part_c(self) -> None:
+        self.steps.append("produce_part_c")
+
+
+class ProductBatch:
+    """
+    Many products in columnar form. `recipes` holds each distinct tuple of
+    parts once; `codes` holds, per product, the index of its tuple.
+    """
+
+    def __init__(self) -> None:
+        self.recipes: List[Tuple[Any, ...]] = []
+        self._recipe_codes: Dict[Tuple[Any, ...], int] = {}
+        self.codes = array("H")
+
+    def append_many(self, parts: Tuple[Any, ...], count: int) -> None:
+        code = self._recipe_codes.get(parts)
+        if code is None:
+            code = self._recipe_codes[parts] = len(self.recipes)
+            self.recipes.append(parts)
+
+        self.codes.extend(array("H", [code]) * count)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, index: int) -> Product1:
+        return Product1(self.recipes[self.codes[index]])
+
+    def __iter__(self) -> Iterator[Product1]:
+        # a new product per row, so changing one doesn't change the others
+        recipes = self.recipes
+        for code in self.codes:
+            yield Product1(recipes[code])
+
+    def count_parts(self) -> Dict[Any, int]:
+        """
+        How many of each part the whole batch needs, without touching the
+        products one by one.
+        """
+
+        # one pass over the codes, however many recipes there are
+        per_recipe = Counter(self.codes)
+        totals: Dict[Any, int] = {}
+        for code, products in per_recipe.items():
+            for part in self.recipes[code]:
+                totals[part] = totals.get(part, 0) + products
+        return totals
+
+
+class ConcreteBuilder1(Builder):
+    PARTS = {
+        "produce_part_a": "PartA1",
+        "produce_part_b": "PartB1",
+        "produce_part_c": "PartC1",
+    }
+
+    def __init__(self) -> None:
+        self.reset()
+        self._compiled: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+    def reset(self) -> None:
+        self._product = Product1()
+
+    @property
+    def product(self) -> Product1:
+        product = self._product
+        self.reset()
+        return product
+
+    def produce_part_a(self) -> None:
+        self._product.add(self.PARTS["produce_part_a"])
+
+    def produce_part_b(self) -> None:
+        self._product.add(self.PARTS["produce_part_b"])
+
+    def produce_part_c(self) -> None:
+        self._product.add(self.PARTS["produce_part_c"])
+
+    def parts_for(self, recipe: CompiledRecipe) -> Tuple[str, ...]:
+        parts = self._compiled.get(recipe.steps)
+        if parts is None:
+            parts = self._compiled[recipe.steps] = tuple(self.PARTS[step] for step in recipe.steps)
+        return parts
+
+    def build(self, recipe: CompiledRecipe) -> Product1:
+        return Product1(self.parts_for(recipe))
+
+    def build_many(self, recipe: CompiledRecipe, count: int, batch: ProductBatch = None) -> ProductBatch:
+        batch = batch if batch is not None else ProductBatch()
+        batch.append_many(self.parts_for(recipe), count)
+        return batch
+
+
+class Director:
+    def __init__(self) -> None:
+        self._builder = None
+        self._recipes: Dict[str, CompiledRecipe] = {}
+
+    @property
+    def builder(self) -> Builder:
+        return self._builder
+
+    @builder.setter
+    def builder(self, builder: Builder) -> None:
+        self._builder = builder
+
+    def build_minimal_viable_product(self) -> None:
+        self.builder.produce_part_a()
+
+    def build_full_featured_product(self) -> None:
+        self.builder.produce_part_a()
+        self.builder.produce_part_b()
+        self.builder.produce_part_c()
+
+    def compile(self, recipe_name: str) -> CompiledRecipe:
+        """
+        Run a recipe once against a recording builder and keep the steps.
+        """
+
+        recipe = self._recipes.get(recipe_name)
+        if recipe is None:
+            builder, self._builder = self._builder, _RecordingBuilder()
+            try:
+                getattr(self, recipe_name)()
+                steps = tuple(self._builder.steps)
+            finally:
+                self._builder = builder
+            recipe = self._recipes[recipe_name] = CompiledRecipe(recipe_name, steps)
+        return recipe
+
+
+def benchmark(count: int = 1_000_000) -> None:
+    director = Director()
+    builder = ConcreteBuilder1()
+    director.builder = builder
+
+    def one_by_one():
+        products = []
+        for _ in range(count):
+            director.build_full_featured_product()
+            products.append(builder.product)
+        return products
+
+    recipe = director.compile("build_full_featured_product")
+
+    classic = timeit.timeit(one_by_one, number=1)
+    bulk = timeit.timeit(lambda: builder.build_many(recipe, count), number=1)
+    print(f"{count:,} full featured products:")
+    print(f"  Director, one by one: {classic * 1e3:8.2f} ms")
+    print(f"  compiled build_many:  {bulk * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    director = Director()
+    builder = ConcreteBuilder1()
+    director.builder = builder
+
+    print("Standard basic product: ")
+    director.build_minimal_viable_product()
+    builder.product.list_parts()
+
+    print("\n")
+
+    full = director.compile("build_full_featured_product")
+    minimal = director.compile("build_minimal_viable_product")
+    print(full)
+
+    batch = builder.build_many(full, 3)
+    builder.build_many(minimal, 2, batch)
+    print(f"A batch of {len(batch)} products: ")
+    batch[0].list_parts()
+    print()
+    products = list(batch)
+    products[0].add("PartD1")
+    assert "PartD1" in products[0].parts and "PartD1" not in products[1].parts
+    print(f"Parts needed for the whole batch: {batch.count_parts()}")
+    print()
+
+    benchmark()
@@ -0,0 +1,250 @@
+"""
+A pooling variant of the Factory Method pattern.
+
+When products wrap expensive resources, building a new one on every
+`some_operation` call is wasteful. The pooled creators below still use
+`factory_method` to build products, but only when the pool has none to spare:
+finished products get `reset()` and are handed out again.
+
+- ThreadLocalPool keeps a bounded free list per thread, so handing products
+  out needs no locks
+- AsyncPool caps the total number of products and makes coroutines wait (with
+  a timeout) for one to be released
+
+>> uv run python design_patterns/creational/factory_pool.py
+"""
+
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Iterator, List, Optional
+
+
+class Product(ABC):
+    @abstractmethod
+    def operation(self) -> str:
+        pass
+
+    def reset(self) -> None:
+        """
+        Bring the product back to a clean state before it is reused.
+        """
+
+
+class ConcreteProduct1(Product):
+    instances = 0
+
+    def __init__(self) -> None:
+        # pretend this is expensive, e.g. opening a connection
+        ConcreteProduct1.instances += 1
+        self.calls = 0
+
+    def operation(self) -> str:
+        self.calls += 1
+        return "{Result of the ConcreteProduct1}"
+
+    def reset(self) -> None:
+        self.calls = 0
+
+
+class ConcreteProduct2(Product):
+    def operation(self) -> str:
+        return "{Result of the ConcreteProduct2}"
+
+
+@dataclass
+class PoolStats:
+    hits: int = 0
+    allocations: int = 0
+    discarded: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.allocations
+        return self.hits / total if total else 0.0
+
+
+class ThreadLocalPool:
+    """
+    Each thread keeps up to `max_size` idle products. Products released by a
+    thread go back to that thread's free list.
+    """
+
+    def __init__(self, factory: Callable[[], Product], max_size: int = 8) -> None:
+        self._factory = factory
+        self._max_size = max_size
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.stats = PoolStats()
+
+    def _free_list(self) -> List[Product]:
+        free = getattr(self._local, "free", None)
+        if free is None:
+            free = self._local.free = []
+        return free
+
+    @contextmanager
+    def acquire(self) -> Iterator[Product]:
+        free = self._free_list()
+        if free:
+            product = free.pop()
+            hit = True
+        else:
+            product = self._factory()
+            hit = False
+
+        try:
+            yield product
+        finally:
+            product.reset()
+            kept = len(free) < self._max_size
+            if kept:
+                free.append(product)
+
+            with self._stats_lock:
+                self.stats.hits += hit
+                self.stats.allocations += not hit
+                self.stats.discarded += not kept
+
+
+class AsyncPool:
+    """
+    At most `max_size` products exist at a time. When all of them are in use,
+    `acquire` waits for one to come back, up to `timeout` seconds.
+    If the factory or a product's `reset` raises, its slot is given back.
+    """
+
+    def __init__(self, factory: Callable[[], Product], max_size: int = 8) -> None:
+        self._factory = factory
+        self._max_size = max_size
+        self._idle: Optional[asyncio.Queue] = None
+        self._created = 0
+        self.stats = PoolStats()
+
+    @asynccontextmanager
+    async def acquire(self, timeout: float = None) -> AsyncIterator[Product]:
+        # created lazily so the pool binds to the loop that actually uses it
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+
+        if not self._idle.empty():
+            product = self._idle.get_nowait()
+        elif self._created < self._max_size:
+            self._created += 1
+            product = None
+        else:
+            product = await asyncio.wait_for(self._idle.get(), timeout)
+
+        if product is None:
+            # a new slot, or one left empty by a failed factory call
+            try:
+                product = self._factory()
+            except BaseException:
+                # give the slot back, as an empty one whoever takes it fills
+                self._idle.put_nowait(None)
+                raise
+            self.stats.allocations += 1
+        else:
+            self.stats.hits += 1
+
+        try:
+            yield product
+        finally:
+            try:
+                product.reset()
+            except BaseException:
+                # can't be reused: drop it, and leave its slot empty for the next one
+                self.stats.discarded += 1
+                self._idle.put_nowait(None)
+                raise
+            self._idle.put_nowait(product)
+
+
+class Creator(ABC):
+    @abstractmethod
+    def factory_method(self) -> Product:
+        pass
+
+    def some_operation(self) -> str:
+        product = self.factory_method()
+        return f"Creator: The same creator's code has just worked with {product.operation()}"
+
+
+class PooledCreator(Creator):
+    """
+    Reuses products from a per-thread pool instead of building one per call.
+    """
+
+    def __init__(self, max_size: int = 8) -> None:
+        self.pool = ThreadLocalPool(self.factory_method, max_size)
+
+    def some_operation(self) -> str:
+        with self.pool.acquire() as product:
+            return f"Creator: The same creator's code has just worked with {product.operation()}"
+
+
+class AsyncPooledCreator(Creator):
+    def __init__(self, max_size: int = 8, timeout: float = None) -> None:
+        self.pool = AsyncPool(self.factory_method, max_size)
+        self._timeout = timeout
+
+    async def some_operation(self) -> str:
+        async with self.pool.acquire(self._timeout) as product:
+            return f"Creator: The same creator's code has just worked with {product.operation()}"
+
+
+class ConcreteCreator1(PooledCreator):
+    def factory_method(self) -> Product:
+        return ConcreteProduct1()
+
+
+class ConcreteCreator2(PooledCreator):
+    def factory_method(self) -> Product:
+        return ConcreteProduct2()
+
+
+class AsyncConcreteCreator1(AsyncPooledCreator):
+    def factory_method(self) -> Product:
+        return ConcreteProduct1()
+
+
+class SlowAsyncConcreteCreator1(AsyncConcreteCreator1):
+    """
+    For the demo: holds on to each product for a while, as real work would,
+    so concurrent operations compete for the pool.
+    """
+
+    async def some_operation(self) -> str:
+        async with self.pool.acquire(self._timeout) as product:
+            await asyncio.sleep(0.01)
+            return f"Creator: The same creator's code has just worked with {product.operation()}"
+
+
+def client_code(creator: Creator) -> None:
+    print(f"Client: I'm not aware of the creator's class, but it still works. {creator.some_operation()}")
+
+
+async def async_client_code(creator: AsyncPooledCreator) -> None:
+    results = await asyncio.gather(*(creator.some_operation() for _ in range(100)))
+    print(f"Client: {len(results)} concurrent operations done.")
+
+
+if __name__ == "__main__":
+    print("App: Launched with the pooled ConcreteCreator1.")
+    creator = ConcreteCreator1()
+    for _ in range(3):
+        client_code(creator)
+    print(f"App: pool stats {creator.pool.stats}, hit rate {creator.pool.stats.hit_rate:.0%}")
+    print("\n")
+
+    print("App: Launched with the pooled ConcreteCreator2.")
+    client_code(ConcreteCreator2())
+    print("\n")
+
+    print("App: Launched with the async pooled ConcreteCreator1.")
+    async_creator = SlowAsyncConcreteCreator1(max_size=4, timeout=1.0)
+    asyncio.run(async_client_code(async_creator))
+    print(f"App: pool stats {async_creator.pool.stats}, hit rate {async_creator.pool.stats.hit_rate:.0%}")
+    print(f"App: {ConcreteProduct1.instances} ConcreteProduct1 objects were built in total")
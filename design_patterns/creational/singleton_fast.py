@@ -0,0 +1,164 @@
+"""
+A thread-safe singleton without a lock on the hot path.
+
+The SingletonMeta in singleton_thread.py takes one global lock on every call,
+even long after the instance exists, so every `Singleton()` from every thread
+(for every singleton class) queues up behind it. Here:
+
+- once the instance exists, getting it is a plain attribute read, no lock
+- creating it is guarded by a lock that belongs to that class only, with the
+  usual double check so only the first caller builds it
+- AsyncSingleton does the same for instances built by a coroutine: concurrent
+  awaiters share one initialisation instead of racing
+
+The benchmark runs on regular and free-threaded (3.13t+) builds alike.
+
+>> uv run python design_patterns/creational/singleton_fast.py
+"""
+
+import asyncio
+import sys
+import time
+from threading import Lock, Thread
+from typing import Awaitable, Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class SingletonMeta(type):
+    def __init__(cls, name, bases, namespace) -> None:
+        super().__init__(name, bases, namespace)
+        # every singleton class gets its own lock and its own slot
+        cls._singleton_lock = Lock()
+        cls._singleton_instance = None
+
+    def __call__(cls, *args, **kwargs):
+        instance = cls._singleton_instance
+        if instance is not None:
+            return instance
+
+        with cls._singleton_lock:
+            # somebody may have beaten us to it while we waited for the lock
+            if cls._singleton_instance is None:
+                # only published once __init__ has finished
+                cls._singleton_instance = super().__call__(*args, **kwargs)
+
+        return cls._singleton_instance
+
+
+class Singleton(metaclass=SingletonMeta):
+    def __init__(self, value: str) -> None:
+        self.value = value
+
+    def some_business_logic(self):
+        pass
+
+
+class AsyncSingleton(Generic[T]):
+    """
+    Lazily builds one instance with a coroutine factory:
+
+        config = AsyncSingleton(load_config)
+        settings = await config.get()
+
+    If the factory fails, the next `get` tries again.
+    """
+
+    def __init__(self, factory: Callable[[], Awaitable[T]]) -> None:
+        self._factory = factory
+        self._instance: Optional[T] = None
+        self._initialising: Optional[asyncio.Future] = None
+
+    async def get(self) -> T:
+        if self._instance is not None:
+            return self._instance
+
+        if self._initialising is None:
+            self._initialising = asyncio.ensure_future(self._factory())
+
+        initialising = self._initialising
+        try:
+            # shield, so one cancelled caller doesn't cancel it for everybody
+            instance = await asyncio.shield(initialising)
+        except BaseException:
+            if initialising.done() and self._initialising is initialising:
+                self._initialising = None
+            raise
+
+        self._instance = instance
+        return instance
+
+
+class LockedSingletonMeta(type):
+    """
+    The implementation from singleton_thread.py, for the benchmark.
+    """
+
+    _instances = {}
+    _lock: Lock = Lock()
+
+    def __call__(cls, *args, **kwargs):
+        with cls._lock:
+            if cls not in cls._instances:
+                instance = super().__call__(*args, **kwargs)
+                cls._instances[cls] = instance
+
+        return cls._instances[cls]
+
+
+class LockedSingleton(metaclass=LockedSingletonMeta):
+    def __init__(self, value: str) -> None:
+        self.value = value
+
+
+def benchmark(threads: int = 8, calls: int = 200_000) -> None:
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"{threads} threads x {calls:,} calls (GIL {'enabled' if gil else 'disabled'}):")
+
+    for cls in (LockedSingleton, Singleton):
+        cls("warm up")
+
+        def hammer():
+            for _ in range(calls):
+                cls("ignored")
+
+        workers = [Thread(target=hammer) for _ in range(threads)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+
+        print(f"  {cls.__name__:>15}: {elapsed * 1e3:8.1f} ms, "
+              f"{elapsed / (threads * calls) * 1e9:6.1f} ns/call")
+
+
+def test_singleton(value: str) -> None:
+    singleton = Singleton(value)
+    print(singleton.value)
+
+
+async def test_async_singleton() -> None:
+    async def load_config() -> dict:
+        print("Loading config, once.")
+        await asyncio.sleep(0.1)
+        return {"answer": 42}
+
+    config = AsyncSingleton(load_config)
+    results = await asyncio.gather(*(config.get() for _ in range(10)))
+    print(f"All 10 awaiters got the same object: {all(r is results[0] for r in results)}")
+
+
+if __name__ == "__main__":
+    process1 = Thread(target=test_singleton, args=("FOO",))
+    process2 = Thread(target=test_singleton, args=("BAR",))
+    process1.start()
+    process2.start()
+    process1.join()
+    process2.join()
+
+    asyncio.run(test_async_singleton())
+    print()
+
+    benchmark()
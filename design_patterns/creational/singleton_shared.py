@@ -0,0 +1,287 @@
+"""
+A singleton that is built once for a whole process pool.
+
+With the plain SingletonMeta every worker process builds its own copy of an
+expensive singleton, so a lookup table is held once per worker. Here the
+parent process builds the instance and publishes its buffer-like state in a
+shared memory block. Workers attach to that block and get a read-only,
+zero-copy view of it instead of building their own.
+
+A singleton class opts in by implementing:
+
+- `__shared_buffers__()` -> {name: buffer}, the state to publish
+- `__shared_meta__()` -> small picklable extras (optional)
+- `__from_shared__(buffers, meta)` classmethod, rebuilding an instance around
+  read-only memoryviews of those buffers
+
+`invalidate` replaces the instance: the parent builds a new one and publishes
+it in a new block under the next generation number before announcing that
+generation, so workers re-attach to it on their next access. The old block is
+unlinked afterwards.
+
+>> uv run python design_patterns/creational/singleton_shared.py
+"""
+
+import os
+import pickle
+import struct
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Value
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional, Tuple
+
+_HEADER = struct.Struct("<Q")
+
+# the registry this process uses, installed by the parent or a pool initializer
+_registry: Optional["SharedSingletonRegistry"] = None
+
+
+def _aligned(offset: int) -> int:
+    # keep every buffer 8-byte aligned so it can be cast to any item size
+    return (offset + 7) & ~7
+
+
+def _open(name: str) -> SharedMemory:
+    if sys.version_info >= (3, 13):
+        # the parent owns the block, don't let this process' tracker unlink it
+        return SharedMemory(name=name, track=False)
+    return SharedMemory(name=name)
+
+
+def _publish(name: str, instance: Any) -> SharedMemory:
+    """
+    Block layout: header length, pickled layout header, then the buffers,
+    each starting on an 8-byte boundary.
+    """
+
+    views = {key: memoryview(value) for key, value in instance.__shared_buffers__().items()}
+    buffers = {key: view.cast("B") for key, view in views.items()}
+    meta = instance.__shared_meta__() if hasattr(instance, "__shared_meta__") else None
+
+    layout = {}
+    offset = 0
+    for key, buffer in buffers.items():
+        layout[key] = (offset, buffer.nbytes, views[key].format)
+        offset += _aligned(buffer.nbytes)
+
+    header = pickle.dumps({"layout": layout, "meta": meta})
+    start = _aligned(_HEADER.size + len(header))
+
+    shm = SharedMemory(name=name, create=True, size=max(start + offset, 1))
+    try:
+        _HEADER.pack_into(shm.buf, 0, len(header))
+        shm.buf[_HEADER.size:_HEADER.size + len(header)] = header
+        for key, buffer in buffers.items():
+            buffer_offset, nbytes, _ = layout[key]
+            shm.buf[start + buffer_offset:start + buffer_offset + nbytes] = buffer
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+
+    return shm
+
+
+def _attach(name: str) -> Tuple[SharedMemory, Dict[str, memoryview], Any]:
+    shm = _open(name)
+    (header_size,) = _HEADER.unpack_from(shm.buf, 0)
+    header = pickle.loads(shm.buf[_HEADER.size:_HEADER.size + header_size])
+    start = _aligned(_HEADER.size + header_size)
+
+    data = shm.buf.toreadonly()
+    views = {
+        key: data[start + offset:start + offset + nbytes].cast(fmt)
+        for key, (offset, nbytes, fmt) in header["layout"].items()
+    }
+    return shm, views, header["meta"]
+
+
+class SharedSingletonRegistry:
+    def __init__(self, prefix: str = None) -> None:
+        self._prefix = prefix or f"singleton_{os.getpid()}"
+        self._owner_pid = os.getpid()
+        # class name -> generation, shared with the workers
+        self._generations: Dict[str, Any] = {}
+        # class name -> (generation, instance, shared memory block)
+        self._instances: Dict[str, Tuple[int, Any, SharedMemory]] = {}
+        # class name -> the arguments the owner last built it with
+        self._arguments: Dict[str, Tuple[tuple, dict]] = {}
+        self._retired: List[SharedMemory] = []
+
+    def register(self, cls: type) -> None:
+        """
+        Must happen in the parent before the workers start.
+        """
+
+        self._generations.setdefault(cls.__qualname__, Value("Q", 0))
+
+    @property
+    def is_owner(self) -> bool:
+        return os.getpid() == self._owner_pid
+
+    def _block_name(self, key: str, generation: int) -> str:
+        return f"{self._prefix}_{key}_{generation}"
+
+    def instance(self, cls: type, args: tuple, kwargs: dict) -> Any:
+        key = cls.__qualname__
+        generation = self._generations[key].value
+
+        cached = self._instances.get(key)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+
+        if cached is not None:
+            # drop our reference to the old instance (and its views) first
+            shm = cached[2]
+            del self._instances[key], cached
+            self._release(shm, unlink=self.is_owner)
+
+        if self.is_owner:
+            instance, shm = self._build(cls, generation, args, kwargs)
+        else:
+            while True:
+                try:
+                    shm, views, meta = _attach(self._block_name(key, generation))
+                    break
+                except FileNotFoundError:
+                    # invalidated between reading the generation and attaching
+                    latest = self._generations[key].value
+                    if latest == generation:
+                        raise
+                    generation = latest
+            instance = cls.__from_shared__(views, meta)
+
+        self._instances[key] = (generation, instance, shm)
+        return instance
+
+    def _build(self, cls: type, generation: int, args: tuple, kwargs: dict) -> Tuple[Any, SharedMemory]:
+        key = cls.__qualname__
+        instance = type.__call__(cls, *args, **kwargs)
+        shm = _publish(self._block_name(key, generation), instance)
+        self._arguments[key] = (args, kwargs)
+        return instance, shm
+
+    def invalidate(self, cls: type, *args, **kwargs) -> None:
+        """
+        Rebuild the instance, with new arguments or else the ones it was last
+        built with, and publish it before announcing the new generation.
+        """
+
+        if not self.is_owner:
+            raise RuntimeError("Only the process that owns the registry can invalidate")
+
+        key = cls.__qualname__
+        if not args and not kwargs:
+            args, kwargs = self._arguments.get(key, ((), {}))
+
+        generation = self._generations[key]
+        with generation.get_lock():
+            instance, shm = self._build(cls, generation.value + 1, args, kwargs)
+            old = self._instances.get(key)
+            self._instances[key] = (generation.value + 1, instance, shm)
+            generation.value += 1
+
+        if old is not None:
+            old_shm = old[2]
+            del old
+            self._release(old_shm, unlink=True)
+
+    def _release(self, shm: SharedMemory, unlink: bool) -> None:
+        try:
+            shm.close()
+        except BufferError:
+            # somebody still holds the old instance; keep the mapping alive
+            self._retired.append(shm)
+        if unlink:
+            shm.unlink()
+
+    def close(self) -> None:
+        for _, _, shm in self._instances.values():
+            self._release(shm, unlink=self.is_owner)
+        self._instances.clear()
+
+    def __getstate__(self) -> dict:
+        # workers start without any instances of their own
+        state = self.__dict__.copy()
+        state["_instances"] = {}
+        state["_retired"] = []
+        state["_arguments"] = {}
+        return state
+
+
+def install(registry: SharedSingletonRegistry) -> None:
+    """
+    Use as the pool initializer, like `init` in concurrency/multiprocess.py.
+    """
+
+    global _registry
+    if not registry.is_owner:
+        # a forked worker inherits the parent's instances, use views instead
+        registry._instances = {}
+        registry._retired = []
+        registry._arguments = {}
+    _registry = registry
+
+
+class SharedSingletonMeta(type):
+    # used when no registry is installed: a singleton per process
+    _instances = {}
+
+    def __call__(cls, *args, **kwargs):
+        if _registry is not None:
+            return _registry.instance(cls, args, kwargs)
+
+        if cls not in cls._instances:
+            cls._instances[cls] = super().__call__(*args, **kwargs)
+
+        return cls._instances[cls]
+
+
+class LookupTable(metaclass=SharedSingletonMeta):
+    """
+    An expensive table: building it is slow and it takes size * 8 bytes.
+    """
+
+    def __init__(self, size: int = 10_000_000) -> None:
+        print(f"LookupTable: building {size:,} entries in process {os.getpid()}")
+        self.values = array("q", (i * i for i in range(size)))
+
+    def lookup(self, i: int) -> int:
+        return self.values[i]
+
+    def __shared_buffers__(self) -> Dict[str, Any]:
+        return {"values": self.values}
+
+    @classmethod
+    def __from_shared__(cls, buffers: Dict[str, memoryview], meta: Any) -> "LookupTable":
+        table = cls.__new__(cls)
+        table.values = buffers["values"]
+        return table
+
+
+def worker(i: int) -> Tuple[int, int, bool]:
+    table = LookupTable()
+    return os.getpid(), table.lookup(i), isinstance(table.values, memoryview)
+
+
+if __name__ == "__main__":
+    registry = SharedSingletonRegistry()
+    registry.register(LookupTable)
+    install(registry)
+
+    table = LookupTable(1_000_000)
+    print(f"Parent: table[1000] = {table.lookup(1000)}")
+
+    with ProcessPoolExecutor(max_workers=4, initializer=install, initargs=(registry,)) as pool:
+        for pid, value, shared in pool.map(worker, [10, 20, 30, 40]):
+            print(f"Worker {pid}: got {value}, zero-copy view: {shared}")
+
+        print("\nParent: replacing the table with a smaller one")
+        registry.invalidate(LookupTable, 1000)
+
+        for pid, value, shared in pool.map(worker, [10, 999]):
+            print(f"Worker {pid}: got {value}, zero-copy view: {shared}")
+
+    registry.close()
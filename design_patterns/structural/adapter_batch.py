@@ -0,0 +1,158 @@
+"""
+A batch variant of the Adapter pattern.
+
+Adapting one legacy record per call means one Python call, one string
+reversal and one f-string per record. BatchAdapter translates a whole batch of
+Adaptee results at once with vectorised Polars string operations, and keeps a
+bounded LRU cache keyed on the adaptee output so repeated records are only
+translated once. The batch path gives exactly the same result as
+`Adapter.request` per item.
+
+>> uv run python design_patterns/structural/adapter_batch.py
+"""
+
+import random
+import string
+import timeit
+from collections import OrderedDict
+from typing import List, Sequence
+
+import polars as pl
+
+PREFIX = "Adapter: (TRANSLATED) "
+
+
+class Target:
+    def request(self) -> str:
+        return "Target: The default target's behavior."
+
+    def request_many(self, count: int) -> List[str]:
+        return [self.request() for _ in range(count)]
+
+
+class Adaptee:
+    def specific_request(self) -> str:
+        return ".eetpadA eht fo roivaheb laicepS"
+
+
+class LegacyRecords(Adaptee):
+    """
+    An adaptee holding many legacy records, handed out one by one or in bulk.
+    """
+
+    def __init__(self, records: Sequence[str]) -> None:
+        self._records = list(records)
+        self._position = 0
+
+    def specific_request(self) -> str:
+        record = self._records[self._position % len(self._records)]
+        self._position += 1
+        return record
+
+    def specific_request_many(self, count: int) -> List[str]:
+        start = self._position % len(self._records)
+        batch = (self._records[start:] + self._records[:start]) * (count // len(self._records) + 1)
+        self._position += count
+        return batch[:count]
+
+
+class Adapter(Target):
+    def __init__(self, adaptee: Adaptee) -> None:
+        self.adaptee = adaptee
+
+    def request(self) -> str:
+        return f"{PREFIX}{self.adaptee.specific_request()[::-1]}"
+
+
+class BatchAdapter(Adapter):
+    """
+    `request` behaves exactly like Adapter.request; `request_many` and
+    `translate_many` work on whole batches.
+    """
+
+    def __init__(self, adaptee: Adaptee, cache_size: int = 100_000) -> None:
+        super().__init__(adaptee)
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._cache_size = cache_size
+
+    def request_many(self, count: int) -> List[str]:
+        if hasattr(self.adaptee, "specific_request_many"):
+            raw = self.adaptee.specific_request_many(count)
+        else:
+            raw = [self.adaptee.specific_request() for _ in range(count)]
+        return self.translate_many(raw)
+
+    def translate_many(self, raw: Sequence[str]) -> List[str]:
+        cache = self._cache
+        translated = {}
+        misses = []
+        for value in dict.fromkeys(raw):
+            hit = cache.get(value)
+            if hit is None:
+                misses.append(value)
+            else:
+                # least recently used entries are the ones evicted
+                cache.move_to_end(value)
+                translated[value] = hit
+
+        if misses:
+            # Polars reverses grapheme clusters while str[::-1] reverses code
+            # points, so only ASCII goes through the vectorised path
+            ascii_misses = [value for value in misses if value.isascii()]
+            reversed_ = pl.Series("raw", ascii_misses, dtype=pl.String).str.reverse()
+            translated.update(zip(ascii_misses, pl.select(pl.lit(PREFIX) + reversed_).to_series().to_list()))
+            translated.update((value, f"{PREFIX}{value[::-1]}") for value in misses if not value.isascii())
+
+            cache.update((value, translated[value]) for value in misses)
+            while len(cache) > self._cache_size:
+                cache.popitem(last=False)
+
+        return [translated[value] for value in raw]
+
+    def cache_info(self) -> dict:
+        return {"size": len(self._cache), "max_size": self._cache_size}
+
+
+def client_code(target: Target) -> None:
+    print(target.request())
+
+
+def benchmark(count: int = 1_000_000, distinct: int = 50_000) -> None:
+    records = ["".join(random.choices(string.ascii_letters + " ", k=40)) for _ in range(distinct)]
+
+    single = Adapter(LegacyRecords(records))
+    per_item = timeit.timeit(lambda: [single.request() for _ in range(count)], number=1)
+
+    batch_adapter = BatchAdapter(LegacyRecords(records))
+    cold = timeit.timeit(lambda: batch_adapter.request_many(count), number=1)
+    warm = timeit.timeit(lambda: batch_adapter.request_many(count), number=1)
+
+    print(f"{count:,} records ({distinct:,} distinct):")
+    print(f"  Adapter.request per item: {per_item * 1e3:8.1f} ms")
+    print(f"  BatchAdapter, cold cache: {cold * 1e3:8.1f} ms")
+    print(f"  BatchAdapter, warm cache: {warm * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    print("Client: I can work just fine with the Target objects:")
+    target = Target()
+    client_code(target)
+    print("\n")
+
+    adaptee = Adaptee()
+    print("Client: But I can work with it via the BatchAdapter, one at a time:")
+    adapter = BatchAdapter(adaptee)
+    client_code(adapter)
+
+    print("Client: ...or many at a time:")
+    batch = adapter.request_many(3)
+    print(batch)
+    assert batch == [Adapter(adaptee).request()] * 3
+
+    unicode_records = ["héllo wörld", "", "a_b", "🙂 ok", "e\u0301x"]
+    assert BatchAdapter(Adaptee()).translate_many(unicode_records) == [
+        f"{PREFIX}{record[::-1]}" for record in unicode_records
+    ]
+    print()
+
+    benchmark()
@@ -0,0 +1,310 @@
+"""
+An asynchronous variant of the Bridge pattern.
+
+The abstraction (Remote) no longer calls the implementation (Device) directly.
+Remotes put commands on a per-device queue and a pluggable Transport delivers
+them. Before delivery, the queue collapses redundant commands:
+
+- repeated `set_volume` calls only send the last value
+- only the last power command counts, so an on/off pair becomes a single off
+- a command that wouldn't change the device's last known state is dropped
+
+Queues of different devices are flushed concurrently, so broadcasting to
+thousands of devices takes about as long as the slowest one. Flushes of the
+same device take turns, so its commands arrive in order, and commands whose
+delivery failed go back on the queue.
+
+>> uv run python design_patterns/structural/bridge_async.py
+"""
+
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+
+class Command(NamedTuple):
+    name: str
+    value: Optional[int] = None
+
+
+# ---------- IMPLEMENTATION (Device) ----------
+
+class Device(ABC):
+    @abstractmethod
+    async def turn_on(self):
+        pass
+
+    @abstractmethod
+    async def turn_off(self):
+        pass
+
+    @abstractmethod
+    async def set_volume(self, value):
+        pass
+
+
+class TV(Device):
+    async def turn_on(self):
+        await asyncio.sleep(0.05)
+        print("TV on")
+
+    async def turn_off(self):
+        await asyncio.sleep(0.05)
+        print("TV off")
+
+    async def set_volume(self, v):
+        await asyncio.sleep(0.05)
+        print(f"TV volume = {v}")
+
+
+class Radio(Device):
+    async def turn_on(self):
+        await asyncio.sleep(0.05)
+        print("Radio on")
+
+    async def turn_off(self):
+        await asyncio.sleep(0.05)
+        print("Radio off")
+
+    async def set_volume(self, v):
+        await asyncio.sleep(0.05)
+        print(f"Radio volume = {v}")
+
+
+class SilentDevice(Device):
+    """
+    A device that only simulates network latency, for the benchmark.
+    """
+
+    async def turn_on(self):
+        await asyncio.sleep(0.05)
+
+    async def turn_off(self):
+        await asyncio.sleep(0.05)
+
+    async def set_volume(self, v):
+        await asyncio.sleep(0.05)
+
+
+# ---------- TRANSPORT ----------
+
+class Transport(ABC):
+    """
+    How commands reach a device: in process, over HTTP, MQTT, ...
+    """
+
+    @abstractmethod
+    async def send(self, device_id: str, commands: List[Command]) -> None:
+        pass
+
+
+class LocalTransport(Transport):
+    def __init__(self, devices: Dict[str, Device]) -> None:
+        self._devices = devices
+
+    async def send(self, device_id: str, commands: List[Command]) -> None:
+        device = self._devices[device_id]
+        for command in commands:
+            if command.name == "set_volume":
+                await device.set_volume(command.value)
+            else:
+                await getattr(device, command.name)()
+
+
+class CommandQueue:
+    """
+    The pending commands of one device, already collapsed.
+    """
+
+    def __init__(self) -> None:
+        self.power: Optional[bool] = None
+        self.volume: Optional[int] = None
+        # what the device was last told, so no-op commands can be dropped
+        self.known_power: Optional[bool] = None
+        self.known_volume: Optional[int] = None
+        self.coalesced = 0
+        # one flush at a time per device
+        self.lock = asyncio.Lock()
+
+    def put(self, command: Command) -> None:
+        if command.name == "set_volume":
+            self.coalesced += self.volume is not None
+            self.volume = command.value
+        else:
+            self.coalesced += self.power is not None
+            self.power = command.name == "turn_on"
+
+    def take(self) -> List[Command]:
+        commands = []
+        power, volume = self.power, self.volume
+        self.power = self.volume = None
+
+        if power is not None and power == self.known_power:
+            power = None
+            self.coalesced += 1
+        if volume is not None and volume == self.known_volume:
+            volume = None
+            self.coalesced += 1
+
+        # turn on before changing the volume, change the volume before turning off
+        if power is True:
+            commands.append(Command("turn_on"))
+        if volume is not None:
+            commands.append(Command("set_volume", volume))
+        if power is False:
+            commands.append(Command("turn_off"))
+
+        return commands
+
+    def put_back(self, commands: List[Command]) -> None:
+        """
+        Requeue commands that couldn't be delivered, unless newer ones were
+        put in the meantime.
+        """
+
+        for command in commands:
+            if command.name == "set_volume":
+                if self.volume is None:
+                    self.volume = command.value
+            elif self.power is None:
+                self.power = command.name == "turn_on"
+
+    def delivered(self, commands: List[Command]) -> None:
+        for command in commands:
+            if command.name == "set_volume":
+                self.known_volume = command.value
+            else:
+                self.known_power = command.name == "turn_on"
+
+
+class CommandBus:
+    """
+    Owns the per-device queues and flushes them through the transport.
+    """
+
+    def __init__(self, transport: Transport, max_concurrency: int = 1000) -> None:
+        self._transport = transport
+        self._queues: Dict[str, CommandQueue] = {}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.sent = 0
+
+    def queue(self, device_id: str) -> CommandQueue:
+        queue = self._queues.get(device_id)
+        if queue is None:
+            queue = self._queues[device_id] = CommandQueue()
+        return queue
+
+    def put(self, device_id: str, command: Command) -> None:
+        self.queue(device_id).put(command)
+
+    def broadcast(self, device_ids: Iterable[str], command: Command) -> None:
+        for device_id in device_ids:
+            self.put(device_id, command)
+
+    async def _flush_one(self, device_id: str, queue: CommandQueue) -> None:
+        async with queue.lock:
+            commands = queue.take()
+            if not commands:
+                return
+
+            try:
+                async with self._semaphore:
+                    await self._transport.send(device_id, commands)
+            except BaseException:
+                queue.put_back(commands)
+                raise
+            queue.delivered(commands)
+            self.sent += len(commands)
+
+    async def flush(self) -> None:
+        await asyncio.gather(*(
+            self._flush_one(device_id, queue) for device_id, queue in self._queues.items()
+        ))
+
+    @property
+    def coalesced(self) -> int:
+        return sum(queue.coalesced for queue in self._queues.values())
+
+
+# ---------- ABSTRACTION (Remote) ----------
+
+class Remote:
+    def __init__(self, device_id: str, bus: CommandBus):
+        self.device_id = device_id
+        self.bus = bus
+
+    def on(self):
+        self.bus.put(self.device_id, Command("turn_on"))
+
+    def off(self):
+        self.bus.put(self.device_id, Command("turn_off"))
+
+    def set_volume(self, value: int):
+        self.bus.put(self.device_id, Command("set_volume", value))
+
+    async def flush(self):
+        await self.bus.flush()
+
+
+class AdvancedRemote(Remote):
+    def mute(self):
+        self.set_volume(0)
+
+
+async def main():
+    bus = CommandBus(LocalTransport({"tv": TV(), "radio": Radio()}))
+    tv_remote = AdvancedRemote("tv", bus)
+    radio_remote = Remote("radio", bus)
+
+    tv_remote.on()
+    for volume in range(10):
+        tv_remote.set_volume(volume)
+    tv_remote.mute()
+    radio_remote.on()
+    radio_remote.off()
+    radio_remote.on()
+    await bus.flush()
+
+    # the radio is already on, so this is dropped
+    radio_remote.on()
+    await bus.flush()
+    print(f"sent {bus.sent} commands, {bus.coalesced} collapsed\n")
+
+    # two flushes at once still deliver in order, and a failed send is retried
+    class FlakyTransport(LocalTransport):
+        failures = 1
+
+        async def send(self, device_id: str, commands: List[Command]) -> None:
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError(f"{device_id} unreachable")
+            await super().send(device_id, commands)
+
+    bus = CommandBus(FlakyTransport({"tv": TV()}))
+    tv_remote = Remote("tv", bus)
+    tv_remote.set_volume(3)
+    try:
+        await bus.flush()
+    except ConnectionError as e:
+        print(f"flush failed: {e}")
+    tv_remote.on()
+    first = asyncio.ensure_future(bus.flush())
+    await asyncio.sleep(0.01)
+    tv_remote.set_volume(7)
+    await asyncio.gather(first, bus.flush())
+    assert bus.queue("tv").known_volume == 7
+    print()
+
+    devices = {f"device{i}": SilentDevice() for i in range(5000)}
+    bus = CommandBus(LocalTransport(devices))
+    start = time.perf_counter()
+    bus.broadcast(devices, Command("turn_on"))
+    bus.broadcast(devices, Command("set_volume", 5))
+    await bus.flush()
+    print(f"broadcast to {len(devices)} devices in {time.perf_counter() - start:.2f}s "
+          f"(serially: ~{len(devices) * 2 * 0.05:.0f}s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
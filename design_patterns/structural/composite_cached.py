@@ -0,0 +1,215 @@
+"""
+A Composite whose `operation` is memoised.
+
+In composite.py every `operation` call walks the whole tree and rebuilds every
+`Branch(...)` string, even if nothing changed since the last call. Here each
+Composite keeps its last result:
+
+- `add` / `remove` only clear the cached results on the path from the changed
+  composite up to the root, so after a small edit only that path is rebuilt
+  (each rebuilt composite joins its children's cached strings)
+- results are computed with an explicit stack, so trees deeper than the
+  recursion limit can still be evaluated
+
+Invariant: if a composite has no cached result, none of its ancestors has one
+either, so invalidation can stop at the first ancestor that is already dirty.
+
+>> uv run python design_patterns/structural/composite_cached.py
+"""
+
+import random
+import sys
+import time
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+
+class Component(ABC):
+    __slots__ = ("_parent",)
+
+    def __init__(self) -> None:
+        self._parent: Optional[Component] = None
+
+    @property
+    def parent(self) -> "Component":
+        return self._parent
+
+    @parent.setter
+    def parent(self, parent: "Component"):
+        self._parent = parent
+
+    def add(self, component: "Component") -> None:
+        pass
+
+    def remove(self, component: "Component") -> None:
+        pass
+
+    def is_composite(self) -> bool:
+        return False
+
+    @abstractmethod
+    def operation(self) -> str:
+        pass
+
+
+class Leaf(Component):
+    __slots__ = ()
+
+    def operation(self) -> str:
+        return "Leaf"
+
+
+class Composite(Component):
+    __slots__ = ("_children", "_cache")
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._children: List[Component] = []
+        self._cache: Optional[str] = None
+
+    def add(self, component: Component) -> None:
+        self._children.append(component)
+        component.parent = self
+        self.invalidate()
+
+    def remove(self, component: Component) -> None:
+        self._children.remove(component)
+        component.parent = None
+        self.invalidate()
+
+    def is_composite(self) -> bool:
+        return True
+
+    def invalidate(self) -> None:
+        node = self
+        while node is not None and node._cache is not None:
+            node._cache = None
+            node = node._parent
+
+    def operation(self) -> str:
+        if self._cache is not None:
+            return self._cache
+
+        # post-order walk over the dirty composites only
+        stack = [(self, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if children_done:
+                node._cache = f"Branch({'+'.join([child.operation() for child in node._children])})"
+                continue
+
+            stack.append((node, True))
+            for child in node._children:
+                if isinstance(child, Composite) and child._cache is None:
+                    stack.append((child, False))
+
+        return self._cache
+
+
+def client_code(component: Component) -> None:
+    print(f"RESULT: {component.operation()}", end="")
+
+
+def client_code2(component1: Component, component2: Component) -> None:
+    if component1.is_composite():
+        component1.add(component2)
+
+    print(f"RESULT: {component1.operation()}")
+
+
+def uncached_operation(component: Component) -> str:
+    """
+    What composite.py does on every call.
+    """
+
+    if not isinstance(component, Composite):
+        return component.operation()
+    return f"Branch({'+'.join([uncached_operation(child) for child in component._children])})"
+
+
+def build_tree(fanout: int, depth: int) -> tuple:
+    root = Composite()
+    level = [root]
+    composites = [root]
+    for _ in range(depth - 1):
+        next_level = []
+        for parent in level:
+            for _ in range(fanout):
+                child = Composite()
+                parent.add(child)
+                next_level.append(child)
+        composites.extend(next_level)
+        level = next_level
+
+    for parent in level:
+        for _ in range(fanout):
+            parent.add(Leaf())
+
+    return root, composites, level
+
+
+def benchmark(fanout: int = 10, depth: int = 6, edits: int = 100) -> None:
+    root, composites, bottom = build_tree(fanout, depth)
+    nodes = len(composites) + len(bottom) * fanout
+    print(f"tree of {nodes:,} nodes, depth {depth}:")
+
+    start = time.perf_counter()
+    expected = uncached_operation(root)
+    print(f"  uncached operation:           {(time.perf_counter() - start) * 1e3:9.1f} ms")
+
+    start = time.perf_counter()
+    assert root.operation() == expected
+    print(f"  first cached operation:       {(time.perf_counter() - start) * 1e3:9.1f} ms")
+
+    start = time.perf_counter()
+    for _ in range(edits):
+        parent = random.choice(bottom)
+        leaf = Leaf()
+        parent.add(leaf)
+        root.operation()
+        parent.remove(leaf)
+        root.operation()
+    per_edit = (time.perf_counter() - start) / (2 * edits)
+    print(f"  edit + cached operation:      {per_edit * 1e3:9.1f} ms")
+    assert root.operation() == expected
+
+    start = time.perf_counter()
+    root.operation()
+    print(f"  unchanged cached operation:   {(time.perf_counter() - start) * 1e6:9.1f} us")
+
+
+if __name__ == "__main__":
+    simple = Leaf()
+    print("Client: I've got a simple component:")
+    client_code(simple)
+    print("\n")
+
+    tree = Composite()
+
+    branch1 = Composite()
+    branch1.add(Leaf())
+    branch1.add(Leaf())
+
+    branch2 = Composite()
+    branch2.add(Leaf())
+
+    tree.add(branch1)
+    tree.add(branch2)
+
+    print("Client: Now I've got a composite tree:")
+    client_code(tree)
+    print("\n")
+
+    print("Client: I don't need to check the components classes even when managing the tree:")
+    client_code2(tree, simple)
+
+    deep = node = Composite()
+    for _ in range(sys.getrecursionlimit() * 3):
+        child = Composite()
+        node.add(child)
+        node = child
+    node.add(Leaf())
+    print(f"\nA chain {sys.getrecursionlimit() * 3:,} composites deep evaluates to "
+          f"{len(deep.operation()):,} characters.\n")
+
+    benchmark()
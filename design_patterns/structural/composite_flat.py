@@ -0,0 +1,472 @@
+"""
+A Composite tree stored in flat arrays.
+
+Every Leaf and Composite in composite.py is a Python object with a `__dict__`,
+and every Composite also has a list of children, which adds up to a few
+hundred bytes per node. FlatTree keeps the whole tree in parallel NumPy arrays
+instead, one entry per node:
+
+- `parent`, `first_child`, `last_child`, `next_sibling`: node indices, -1 for none
+- `kind`: LEAF or COMPOSITE
+
+Nodes are plain integers. `tree.node(i)` wraps one in a NodeView, which has
+the same API as Component (parent, add, remove, is_composite, operation), so
+client code written for composite.py works unchanged. Bulk operations
+(`add_many`, `reduce`, `subtree_aggregate`) work on whole arrays and never
+create an object per node. Walks along parent and sibling links use pointer
+jumping, so they take O(log depth) array passes instead of a Python loop.
+
+>> uv run python design_patterns/structural/composite_flat.py
+"""
+
+import time
+import tracemalloc
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+import numpy as np
+
+LEAF = 0
+COMPOSITE = 1
+
+
+class Component(ABC):
+    @property
+    def parent(self) -> "Component":
+        return self._parent
+
+    @parent.setter
+    def parent(self, parent: "Component"):
+        self._parent = parent
+
+    def add(self, component: "Component") -> None:
+        pass
+
+    def remove(self, component: "Component") -> None:
+        pass
+
+    def is_composite(self) -> bool:
+        return False
+
+    @abstractmethod
+    def operation(self) -> str:
+        pass
+
+
+class Leaf(Component):
+    def operation(self) -> str:
+        return "Leaf"
+
+
+class Composite(Component):
+    def __init__(self) -> None:
+        self._children: List[Component] = []
+
+    def add(self, component: Component) -> None:
+        self._children.append(component)
+        component.parent = self
+
+    def remove(self, component: Component) -> None:
+        self._children.remove(component)
+        component.parent = None
+
+    def is_composite(self) -> bool:
+        return True
+
+    def operation(self) -> str:
+        results = []
+        for child in self._children:
+            results.append(child.operation())
+
+        return f"Branch({'+'.join(results)})"
+
+
+def _path_sums(link: np.ndarray, weight: np.ndarray) -> np.ndarray:
+    """
+    For every node, the sum of `weight` over the node itself and everything
+    reachable by following `link` (-1 ends a chain). Pointer jumping: each
+    pass doubles how far every node has looked.
+    """
+
+    total = weight.copy()
+    nxt = link.copy()
+    active = np.flatnonzero(nxt >= 0)
+    while active.size:
+        ahead = nxt[active]
+        total[active] += total[ahead]
+        nxt[active] = nxt[ahead]
+        active = active[nxt[active] >= 0]
+    return total
+
+
+class FlatTree:
+    def __init__(self, capacity: int = 1024) -> None:
+        self._count = 0
+        self._parent = np.full(capacity, -1, dtype=np.int32)
+        self._first_child = np.full(capacity, -1, dtype=np.int32)
+        self._last_child = np.full(capacity, -1, dtype=np.int32)
+        self._next_sibling = np.full(capacity, -1, dtype=np.int32)
+        self._kind = np.zeros(capacity, dtype=np.uint8)
+        # bumped on every structural change, invalidates the preorder index
+        self._version = 0
+        self._preorder = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (
+            self._parent, self._first_child, self._last_child, self._next_sibling, self._kind,
+        ))
+
+    def _reserve(self, extra: int) -> None:
+        needed = self._count + extra
+        capacity = len(self._parent)
+        if needed <= capacity:
+            return
+
+        capacity = max(needed, capacity * 2)
+        for name in ("_parent", "_first_child", "_last_child", "_next_sibling"):
+            old = getattr(self, name)
+            new = np.full(capacity, -1, dtype=np.int32)
+            new[:len(old)] = old
+            setattr(self, name, new)
+        kind = np.zeros(capacity, dtype=np.uint8)
+        kind[:len(self._kind)] = self._kind
+        self._kind = kind
+
+    # ---------- one node at a time ----------
+
+    def new_node(self, kind: int) -> int:
+        self._reserve(1)
+        index = self._count
+        self._kind[index] = kind
+        self._count += 1
+        return index
+
+    def node(self, index: int) -> "NodeView":
+        return NodeView(self, index)
+
+    def leaf(self) -> "NodeView":
+        return self.node(self.new_node(LEAF))
+
+    def composite(self) -> "NodeView":
+        return self.node(self.new_node(COMPOSITE))
+
+    def attach(self, parent: int, child: int) -> None:
+        if self._kind[parent] != COMPOSITE:
+            return
+        if self._parent[child] >= 0:
+            self.detach(child)
+
+        last = self._last_child[parent]
+        if last >= 0:
+            self._next_sibling[last] = child
+        else:
+            self._first_child[parent] = child
+        self._last_child[parent] = child
+        self._parent[child] = parent
+        self._version += 1
+
+    def detach(self, child: int) -> None:
+        parent = self._parent[child]
+        if parent < 0:
+            return
+
+        previous = -1
+        current = self._first_child[parent]
+        while current != child:
+            previous, current = current, self._next_sibling[current]
+
+        following = self._next_sibling[child]
+        if previous >= 0:
+            self._next_sibling[previous] = following
+        else:
+            self._first_child[parent] = following
+        if self._last_child[parent] == child:
+            self._last_child[parent] = previous
+
+        self._parent[child] = -1
+        self._next_sibling[child] = -1
+        self._version += 1
+
+    def children(self, index: int) -> List[int]:
+        result = []
+        child = self._first_child[index]
+        while child >= 0:
+            result.append(int(child))
+            child = self._next_sibling[child]
+        return result
+
+    # ---------- bulk ----------
+
+    def add_many(self, parents: np.ndarray, kind: int) -> np.ndarray:
+        """
+        Append one new node of `kind` under each of `parents`, keeping the
+        order in which they are given among siblings. Returns the new indices.
+        """
+
+        parents = np.asarray(parents, dtype=np.int32)
+        if np.any(self._kind[parents] != COMPOSITE):
+            raise ValueError("Only composites can have children")
+
+        count = len(parents)
+        self._reserve(count)
+        start = self._count
+        new = np.arange(start, start + count, dtype=np.int32)
+        self._kind[start:start + count] = kind
+        self._parent[start:start + count] = parents
+        self._count += count
+
+        # group the new nodes by parent, then chain every group together
+        order = np.argsort(parents, kind="stable")
+        grouped_parents = parents[order]
+        grouped = new[order]
+        same_parent = grouped_parents[1:] == grouped_parents[:-1]
+        self._next_sibling[grouped[:-1][same_parent]] = grouped[1:][same_parent]
+
+        group_starts = np.flatnonzero(np.r_[True, ~same_parent])
+        group_ends = np.r_[group_starts[1:], count] - 1
+        owners = grouped_parents[group_starts]
+        firsts = grouped[group_starts]
+
+        # append every chain after the current last child of its parent
+        previous_last = self._last_child[owners]
+        has_children = previous_last >= 0
+        self._next_sibling[previous_last[has_children]] = firsts[has_children]
+        self._first_child[owners[~has_children]] = firsts[~has_children]
+        self._last_child[owners] = grouped[group_ends]
+
+        self._version += 1
+        return new
+
+    def depth(self) -> np.ndarray:
+        parent = self._parent[:self._count]
+        return _path_sums(parent, (parent >= 0).astype(np.int32))
+
+    def reduce(self, values: np.ndarray, op: np.ufunc = np.add) -> np.ndarray:
+        """
+        Bottom-up reduce: for every node, `op` over the values of its whole
+        subtree. One vectorised pass per level, deepest level first.
+        """
+
+        result = np.array(values[:self._count], copy=True)
+        parent = self._parent[:self._count]
+        depth = self.depth()
+
+        order = np.argsort(depth, kind="stable")
+        boundaries = np.searchsorted(depth[order], np.arange(1, depth.max(initial=0) + 2))
+        for level in range(len(boundaries) - 1, 0, -1):
+            nodes = order[boundaries[level - 1]:boundaries[level]]
+            op.at(result, parent[nodes], result[nodes])
+        return result
+
+    def preorder(self) -> tuple:
+        """
+        (position, order, size): every node's position in a preorder walk of
+        the forest, the nodes sorted by that position, and the subtree sizes.
+        The subtree of `i` is `order[position[i]:position[i] + size[i]]`.
+        """
+
+        if self._preorder is not None and self._preorder[0] == self._version:
+            return self._preorder[1]
+
+        count = self._count
+        parent = self._parent[:count]
+        size = self.reduce(np.ones(count, dtype=np.int64))
+
+        # sizes of the node and of all its later siblings
+        later = _path_sums(self._next_sibling[:count], size)
+
+        # a child starts after its parent and after all its earlier siblings
+        offset = np.zeros(count, dtype=np.int64)
+        has_parent = parent >= 0
+        offset[has_parent] = size[parent[has_parent]] - later[has_parent]
+        roots = np.flatnonzero(~has_parent)
+        offset[roots] = np.cumsum(size[roots]) - size[roots]
+
+        position = _path_sums(parent, offset)
+        order = np.empty(count, dtype=np.int64)
+        order[position] = np.arange(count)
+
+        self._preorder = (self._version, (position, order, size))
+        return self._preorder[1]
+
+    def subtree(self, index: int) -> np.ndarray:
+        position, order, size = self.preorder()
+        return order[position[index]:position[index] + size[index]]
+
+    def subtree_aggregate(self, index: int, values: np.ndarray, op: np.ufunc = np.add):
+        return op.reduce(values[self.subtree(index)])
+
+    def operation(self, index: int) -> str:
+        """
+        The same string as Composite.operation, built without recursion.
+        """
+
+        if self._kind[index] == LEAF:
+            return "Leaf"
+
+        results = {}
+        stack = [(index, False)]
+        while stack:
+            node, children_done = stack.pop()
+            children = self.children(node)
+            if children_done:
+                parts = [results.pop(child) if self._kind[child] == COMPOSITE else "Leaf" for child in children]
+                results[node] = f"Branch({'+'.join(parts)})"
+                continue
+
+            stack.append((node, True))
+            stack.extend((child, False) for child in children if self._kind[child] == COMPOSITE)
+
+        return results[index]
+
+
+class NodeView(Component):
+    """
+    A Component backed by one node of a FlatTree. Views are created on demand
+    and hold nothing but the tree and the index.
+    """
+
+    __slots__ = ("tree", "index")
+
+    def __init__(self, tree: FlatTree, index: int) -> None:
+        self.tree = tree
+        self.index = index
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, NodeView) and other.tree is self.tree and other.index == self.index
+
+    def __hash__(self) -> int:
+        return hash((id(self.tree), self.index))
+
+    @property
+    def parent(self) -> Optional["NodeView"]:
+        parent = self.tree._parent[self.index]
+        return NodeView(self.tree, int(parent)) if parent >= 0 else None
+
+    @parent.setter
+    def parent(self, parent: Optional["NodeView"]):
+        if parent is None:
+            self.tree.detach(self.index)
+        else:
+            self.tree.attach(parent.index, self.index)
+
+    @property
+    def children(self) -> List["NodeView"]:
+        return [NodeView(self.tree, child) for child in self.tree.children(self.index)]
+
+    def add(self, component: "NodeView") -> None:
+        if self.is_composite():
+            self.tree.attach(self.index, component.index)
+
+    def remove(self, component: "NodeView") -> None:
+        if self.is_composite() and self.tree._parent[component.index] == self.index:
+            self.tree.detach(component.index)
+
+    def is_composite(self) -> bool:
+        return self.tree._kind[self.index] == COMPOSITE
+
+    def operation(self) -> str:
+        return self.tree.operation(self.index)
+
+
+def client_code(component: Component) -> None:
+    print(f"RESULT: {component.operation()}", end="")
+
+
+def client_code2(component1: Component, component2: Component) -> None:
+    if component1.is_composite():
+        component1.add(component2)
+
+    print(f"RESULT: {component1.operation()}")
+
+
+def build_objects(fanout: int, depth: int) -> Composite:
+    root = Composite()
+    level = [root]
+    for d in range(depth):
+        next_level = []
+        for parent in level:
+            for _ in range(fanout):
+                child = Leaf() if d == depth - 1 else Composite()
+                parent.add(child)
+                next_level.append(child)
+        level = next_level
+    return root
+
+
+def build_flat(fanout: int, depth: int) -> FlatTree:
+    tree = FlatTree()
+    level = np.array([tree.new_node(COMPOSITE)], dtype=np.int32)
+    for d in range(depth):
+        parents = np.repeat(level, fanout)
+        level = tree.add_many(parents, LEAF if d == depth - 1 else COMPOSITE)
+    return tree
+
+
+def benchmark(fanout: int = 10, depth: int = 6) -> None:
+    for name, build in (("objects", build_objects), ("FlatTree", build_flat)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        tree = build(fanout, depth)
+        elapsed = time.perf_counter() - start
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        nodes = len(tree) if isinstance(tree, FlatTree) else sum(fanout ** d for d in range(depth + 1))
+        print(f"  {name:>8}: {nodes:,} nodes built in {elapsed * 1e3:7.1f} ms, "
+              f"{memory / 2 ** 20:7.1f} MB, {memory / nodes:6.1f} bytes/node")
+
+    weights = np.random.default_rng(0).random(len(tree))
+
+    start = time.perf_counter()
+    totals = tree.reduce(weights)
+    print(f"  bottom-up sum over every subtree: {(time.perf_counter() - start) * 1e3:7.1f} ms")
+
+    start = time.perf_counter()
+    tree.preorder()
+    print(f"  preorder index:                   {(time.perf_counter() - start) * 1e3:7.1f} ms")
+
+    child = tree.children(0)[3]
+    start = time.perf_counter()
+    heaviest = tree.subtree_aggregate(child, weights, np.maximum)
+    total = tree.subtree_aggregate(child, weights)
+    print(f"  aggregates of a {len(tree.subtree(child)):,}-node subtree: "
+          f"{(time.perf_counter() - start) * 1e3:7.1f} ms")
+    assert np.isclose(total, totals[child]) and heaviest <= total
+
+
+if __name__ == "__main__":
+    tree = FlatTree()
+
+    simple = tree.leaf()
+    print("Client: I've got a simple component:")
+    client_code(simple)
+    print("\n")
+
+    root = tree.composite()
+
+    branch1 = tree.composite()
+    branch1.add(tree.leaf())
+    branch1.add(tree.leaf())
+
+    branch2 = tree.composite()
+    branch2.add(tree.leaf())
+
+    root.add(branch1)
+    root.add(branch2)
+
+    print("Client: Now I've got a composite tree:")
+    client_code(root)
+    print("\n")
+
+    print("Client: I don't need to check the components classes even when managing the tree:")
+    client_code2(root, simple)
+
+    branch1.remove(branch1.children[0])
+    print(f"After removing a leaf: {root.operation()}")
+    print(f"Leaves under the root: {tree.subtree_aggregate(root.index, tree._kind[:len(tree)] == LEAF)}\n")
+
+    benchmark()
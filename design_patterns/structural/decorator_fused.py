@@ -0,0 +1,318 @@
+"""
+Fused decorator chains.
+
+With classic decorators, `ConcreteDecoratorA(ConcreteDecoratorB(component))`
+costs a method call, a property lookup and a new string per layer on every
+`operation()`, so a 20-layer stack does 20 calls and builds 20 strings.
+
+Here a decorator describes what it does to the wrapped result instead of
+calling the wrapped object itself:
+
+- wrapping decorators declare a `prefix` and a `suffix`; any run of them is
+  folded into a single prefix and suffix at build time
+- anything else implements `transform(result)`
+- decorators that override `operation` itself are called as they are, around
+  the fused function for the layers inside them
+
+`fuse` turns a chain into a FusedComponent whose `operation` is generated
+once as one flat function: call the component, apply the transforms that
+can't be folded, and concatenate the folded prefix and suffix once. The
+layers stay inspectable and can be added or removed at runtime; the chain is
+re-fused after every change.
+
+>> uv run python design_patterns/structural/decorator_fused.py
+"""
+
+import timeit
+from typing import Callable, Dict, List, Sequence, Tuple, Type, Union
+
+
+class Component:
+    def operation(self) -> str:
+        pass
+
+
+class ConcreteComponent(Component):
+    def operation(self) -> str:
+        return "ConcreteComponent"
+
+
+class Decorator(Component):
+    """
+    A decorator either wraps the result in `prefix` ... `suffix`, or overrides
+    `transform`. Used on its own, it behaves like the classic decorator.
+    """
+
+    _component: Component = None
+    prefix = ""
+    suffix = ""
+
+    def __init__(self, component: Component = None) -> None:
+        self._component = component
+
+    @property
+    def component(self) -> Component:
+        return self._component
+
+    @property
+    def overrides_operation(self) -> bool:
+        return type(self).operation is not Decorator.operation
+
+    @property
+    def is_wrapping(self) -> bool:
+        return type(self).transform is Decorator.transform and not self.overrides_operation
+
+    def transform(self, result: str) -> str:
+        return f"{self.prefix}{result}{self.suffix}"
+
+    def operation(self) -> str:
+        return self.transform(self.component.operation())
+
+
+class ConcreteDecoratorA(Decorator):
+    prefix = "ConcreteDecoratorA("
+    suffix = ")"
+
+
+class ConcreteDecoratorB(Decorator):
+    prefix = "ConcreteDecoratorB("
+    suffix = ")"
+
+
+class Logging(Decorator):
+    """
+    A decorator with its own `operation`: it can only be called, not folded.
+    """
+
+    def __init__(self, component: Component = None) -> None:
+        super().__init__(component)
+        self.calls = 0
+
+    def operation(self) -> str:
+        self.calls += 1
+        return self.component.operation()
+
+
+class Truncating(Decorator):
+    """
+    A decorator that can't be folded into a prefix and suffix.
+    """
+
+    def __init__(self, component: Component = None, max_length: int = 80) -> None:
+        super().__init__(component)
+        self.max_length = max_length
+
+    def transform(self, result: str) -> str:
+        if len(result) <= self.max_length:
+            return result
+        return result[:self.max_length - 3] + "..."
+
+
+LayerSpec = Union[Decorator, Type[Decorator]]
+
+
+class _Stage(Component):
+    """
+    Stands in for the layers inside a decorator that overrides `operation`.
+    """
+
+    def __init__(self, operation: Callable[[], str]) -> None:
+        self.operation = operation
+
+
+_bound_classes: Dict[type, type] = {}
+
+
+def _bind(layer: Decorator, stage: _Stage) -> Decorator:
+    """
+    A view of `layer` whose component is `stage`. It shares the layer's
+    attributes, so state the layer keeps (counters, caches) is the layer's
+    own, but the layer itself, which may also sit in a classic chain or in
+    other fused components, is left alone.
+    """
+
+    cls = type(layer)
+    bound_cls = _bound_classes.get(cls)
+    if bound_cls is None:
+        bound_cls = _bound_classes[cls] = type(cls.__name__, (cls,), {
+            "__slots__": ("_stage",),
+            "component": property(lambda self: self._stage),
+        })
+
+    bound = object.__new__(bound_cls)
+    if hasattr(layer, "__dict__"):
+        bound.__dict__ = layer.__dict__
+    bound._stage = stage
+    return bound
+
+
+def _compile(component: Component, layers: Sequence[Decorator]) -> Callable[[], str]:
+    """
+    Generate one function for the whole chain. `layers` is outermost first.
+    """
+
+    stages = []
+    namespace = {"base": component.operation}
+    body = ["    result = base()"]
+    prefix, suffix = "", ""
+
+    # innermost first, the order in which the classic chain applies them
+    for i, layer in enumerate(reversed(layers)):
+        if layer.overrides_operation:
+            # close the function so far and let the layer call it
+            if prefix or suffix:
+                body.append(f"    result = {prefix!r} + result + {suffix!r}")
+                prefix, suffix = "", ""
+            body.append("    return result")
+            stages.append("\n".join(body))
+            exec("def operation():\n" + stages[-1], namespace)
+
+            namespace = {"base": _bind(layer, _Stage(namespace["operation"])).operation}
+            body = ["    result = base()"]
+            continue
+
+        if layer.is_wrapping:
+            prefix = layer.prefix + prefix
+            suffix = suffix + layer.suffix
+            continue
+
+        if prefix or suffix:
+            body.append(f"    result = {prefix!r} + result + {suffix!r}")
+            prefix, suffix = "", ""
+        namespace[f"transform{i}"] = layer.transform
+        body.append(f"    result = transform{i}(result)")
+
+    if prefix or suffix:
+        body.append(f"    return {prefix!r} + result + {suffix!r}")
+    else:
+        body.append("    return result")
+
+    stages.append("\n".join(body))
+    # one function per stage, innermost first
+    source = "\n\n".join("def operation():\n" + stage for stage in stages)
+    exec("def operation():\n" + stages[-1], namespace)
+    operation = namespace["operation"]
+    operation.__source__ = source
+    return operation
+
+
+class FusedComponent(Component):
+    """
+    `layers` is outermost first, like reading `A(B(component))` left to right.
+    A layer that overrides `operation` is called through a view of it whose
+    component is the fused layers inside it; the layer itself isn't changed.
+    """
+
+    def __init__(self, component: Component, layers: Sequence[LayerSpec] = ()) -> None:
+        self._component = component
+        self._layers: List[Decorator] = [self._instantiate(layer) for layer in layers]
+        self._fuse()
+
+    @staticmethod
+    def _instantiate(layer: LayerSpec) -> Decorator:
+        return layer() if isinstance(layer, type) else layer
+
+    def _fuse(self) -> None:
+        # an instance attribute, so calling it skips the method lookup too
+        self.operation = _compile(self._component, self._layers)
+
+    @property
+    def component(self) -> Component:
+        return self._component
+
+    @property
+    def layers(self) -> Tuple[Decorator, ...]:
+        return tuple(self._layers)
+
+    @property
+    def source(self) -> str:
+        return self.operation.__source__
+
+    def add_layer(self, layer: LayerSpec, position: int = 0) -> Decorator:
+        """
+        Position 0 is the outermost layer.
+        """
+
+        layer = self._instantiate(layer)
+        self._layers.insert(position, layer)
+        self._fuse()
+        return layer
+
+    def remove_layer(self, layer: LayerSpec) -> None:
+        """
+        Remove a layer instance, or the outermost layer of a decorator class.
+        """
+
+        found = layer
+        if isinstance(layer, type):
+            found = next((existing for existing in self._layers if isinstance(existing, layer)), None)
+        if found is None or found not in self._layers:
+            name = layer.__name__ if isinstance(layer, type) else type(layer).__name__
+            raise ValueError(f"No {name} layer to remove")
+        self._layers.remove(found)
+        self._fuse()
+
+
+def fuse(component: Component) -> Component:
+    """
+    Flatten a classic chain of decorators into a FusedComponent.
+    """
+
+    layers = []
+    while isinstance(component, Decorator):
+        layers.append(component)
+        component = component.component
+    return FusedComponent(component, layers) if layers else component
+
+
+def client_code(component: Component) -> None:
+    print(f"RESULT: {component.operation()}", end="")
+
+
+def benchmark(depths: Sequence[int] = (1, 5, 10, 20, 50), number: int = 100_000) -> None:
+    print("per call:")
+    for depth in depths:
+        chain = ConcreteComponent()
+        for i in range(depth):
+            chain = (ConcreteDecoratorA if i % 2 else ConcreteDecoratorB)(chain)
+        fused = fuse(chain)
+        assert fused.operation() == chain.operation()
+
+        nested = timeit.timeit(chain.operation, number=number) / number
+        flat = timeit.timeit(fused.operation, number=number) / number
+        print(f"  depth {depth:>2}: nested {nested * 1e9:7.0f} ns, fused {flat * 1e9:5.0f} ns, "
+              f"{nested / flat:4.1f}x")
+
+
+if __name__ == "__main__":
+    simple = ConcreteComponent()
+    print("Client: I've got a simple component:")
+    client_code(simple)
+    print("\n")
+
+    decorator1 = ConcreteDecoratorA(simple)
+    decorator2 = ConcreteDecoratorB(decorator1)
+    print("Client: Now I've got a decorated component:")
+    client_code(decorator2)
+    print("\n")
+
+    fused = fuse(decorator2)
+    print("Client: The same chain, fused:")
+    client_code(fused)
+    print(f"\nLayers: {[type(layer).__name__ for layer in fused.layers]}\n{fused.source}\n")
+
+    fused.add_layer(Truncating(max_length=30))
+    fused.add_layer(ConcreteDecoratorA)
+    print("Client: With two more layers added at runtime:")
+    client_code(fused)
+    print(f"\n{fused.source}\n")
+
+    fused.remove_layer(Truncating)
+    assert fused.operation() == ConcreteDecoratorA(decorator2).operation()
+
+    logging = fused.add_layer(Logging, position=1)
+    assert fused.operation() == ConcreteDecoratorA(Logging(decorator2)).operation()
+    assert logging.calls == 1
+    print()
+
+    benchmark()
@@ -0,0 +1,214 @@
+"""
+An asynchronous Facade.
+
+Facade.operation in facade.py initialises Subsystem1, then Subsystem2, then
+runs their actions one after another, and joins everything into one string at
+the end. If each step is a network call, the facade is as slow as all of them
+added together.
+
+AsyncFacade instead:
+
+- initialises all subsystems concurrently, and runs each subsystem's action as
+  soon as its own initialisation is done, so the whole operation takes as long
+  as the slowest subsystem's init and action together
+- yields every result as soon as it arrives (`async for line in facade.operation()`)
+- gives every subsystem its own timeout, and its own circuit breaker: after a
+  few failures in a row the subsystem is skipped for a while instead of
+  making every caller wait for its timeout again
+
+>> uv run python design_patterns/structural/facade_async.py
+"""
+
+import asyncio
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+class Subsystem1:
+    async def operation1(self) -> str:
+        await asyncio.sleep(0.2)
+        return "Subsystem1: Ready!"
+
+    async def operation_n(self) -> str:
+        await asyncio.sleep(0.1)
+        return "Subsystem1: Go!"
+
+
+class Subsystem2:
+    async def operation1(self) -> str:
+        await asyncio.sleep(0.3)
+        return "Subsystem2: Get ready!"
+
+    async def operation_z(self) -> str:
+        await asyncio.sleep(0.1)
+        return "Subsystem2: Fire!"
+
+
+class FlakySubsystem:
+    """
+    Hangs on every call, to show timeouts and the circuit breaker.
+    """
+
+    async def operation1(self) -> str:
+        await asyncio.sleep(10)
+        return "FlakySubsystem: Ready!"
+
+    async def operation_x(self) -> str:
+        await asyncio.sleep(10)
+        return "FlakySubsystem: Go!"
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Closed: calls go through. After `failure_threshold` failures in a row it
+    opens and fails calls straight away. After `reset_timeout` seconds one
+    trial call is let through (half open): success closes it again, failure
+    opens it for another `reset_timeout`.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half open"
+        return "open"
+
+    async def call(self, action: Callable[[], Awaitable[str]]) -> str:
+        state = self.state
+        if state == "open" or state == "half open" and self._trial_running:
+            raise CircuitOpenError("circuit open")
+
+        trial = state == "half open"
+        if trial:
+            self._trial_running = True
+        try:
+            result = await action()
+        except Exception:  # not CancelledError: a cancelled caller is not the subsystem's fault
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            raise
+        finally:
+            # only the trial call may end the trial
+            if trial:
+                self._trial_running = False
+
+        self.failures = 0
+        self.opened_at = None
+        return result
+
+
+class AsyncFacade:
+    def __init__(
+        self,
+        subsystems: Dict[str, object],
+        init: Dict[str, str],
+        actions: Dict[str, str],
+        timeouts: Dict[str, float] = None,
+        default_timeout: float = 1.0,
+    ) -> None:
+        """
+        `init` and `actions` map a subsystem name to the name of the coroutine
+        method to call on it in that phase.
+        """
+
+        self._subsystems = subsystems
+        self._init = init
+        self._actions = actions
+        self._timeouts = timeouts or {}
+        self._default_timeout = default_timeout
+        self.breakers = {name: CircuitBreaker() for name in subsystems}
+
+    async def _call(self, name: str, method: str) -> Tuple[str, str, bool]:
+        subsystem = self._subsystems[name]
+        timeout = self._timeouts.get(name, self._default_timeout)
+
+        try:
+            result = await self.breakers[name].call(
+                lambda: asyncio.wait_for(getattr(subsystem, method)(), timeout)
+            )
+        except CircuitOpenError:
+            return name, f"{name}: skipped, circuit open", False
+        except asyncio.TimeoutError:
+            return name, f"{name}: timed out after {timeout}s", False
+        except Exception as e:
+            return name, f"{name}: failed ({e!r})", False
+
+        return name, result, True
+
+    async def _action_after(self, init: Optional[asyncio.Future], name: str, method: str) -> Tuple[str, str, bool]:
+        if init is not None:
+            _, _, ok = await init
+            if not ok:
+                return name, f"{name}: skipped, not initialised", False
+        return await self._call(name, method)
+
+    async def operation(self) -> AsyncIterator[str]:
+        """
+        Every subsystem is told to act as soon as its own initialisation is
+        done, so the whole thing takes as long as the slowest subsystem's init
+        and action together. Results come out as they finish.
+        """
+
+        inits = {name: asyncio.ensure_future(self._call(name, method)) for name, method in self._init.items()}
+        actions = [
+            asyncio.ensure_future(self._action_after(inits.get(name), name, method))
+            for name, method in self._actions.items()
+        ]
+        tasks = [*inits.values(), *actions]
+
+        yield "Facade initializes subsystems and orders them to perform the action:"
+        try:
+            for finished in asyncio.as_completed(tasks):
+                _, result, _ = await finished
+                yield result
+        finally:
+            # the consumer stopped early
+            for task in tasks:
+                task.cancel()
+
+
+async def client_code(facade: AsyncFacade) -> List[str]:
+    start = time.perf_counter()
+    lines = []
+    async for line in facade.operation():
+        lines.append(line)
+        print(f"[{time.perf_counter() - start:5.2f}s] {line}")
+    return lines
+
+
+async def main() -> None:
+    facade = AsyncFacade(
+        {"Subsystem1": Subsystem1(), "Subsystem2": Subsystem2()},
+        init={"Subsystem1": "operation1", "Subsystem2": "operation1"},
+        actions={"Subsystem1": "operation_n", "Subsystem2": "operation_z"},
+    )
+    print("Each subsystem acts right after its own init, the slowest of them sets the pace:")
+    await client_code(facade)
+
+    facade = AsyncFacade(
+        {"Subsystem1": Subsystem1(), "FlakySubsystem": FlakySubsystem()},
+        init={"Subsystem1": "operation1", "FlakySubsystem": "operation1"},
+        actions={"Subsystem1": "operation_n", "FlakySubsystem": "operation_x"},
+        timeouts={"FlakySubsystem": 0.5},
+    )
+    facade.breakers["FlakySubsystem"].failure_threshold = 2
+    for attempt in range(3):
+        print(f"\nAttempt {attempt + 1}, FlakySubsystem circuit {facade.breakers['FlakySubsystem'].state}:")
+        await client_code(facade)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
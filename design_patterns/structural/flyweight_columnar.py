@@ -0,0 +1,297 @@
+"""
+A columnar flyweight store for the police car database.
+
+In flyweight.py every car costs a Python list for its extrinsic state
+([plates, owner]) plus a lookup of its (brand, model, color) flyweight, which
+is itself a Python list. With tens of millions of cars, that per-object
+overhead is most of the memory.
+
+CarDatabase stores the same information in columns:
+
+- intrinsic states are dictionary-encoded: every distinct (brand, model, color)
+  gets an integer code, kept in a small `states` table. This is the flyweight
+- every car is one row of the `cars` table: plates and owner as Polars (Arrow)
+  string columns, plus the UInt32 code of its state
+
+Ingestion encodes whole batches with a join against `states`, and queries
+such as "cars per brand" or "cars of a color" are answered on the codes
+first and then joined against the small table, so nothing ever creates an
+object per car.
+
+>> uv run python design_patterns/structural/flyweight_columnar.py
+"""
+
+import contextlib
+import json
+import time
+import tracemalloc
+from typing import Dict, List, Tuple
+
+import numpy as np
+import polars as pl
+
+STATE = ["brand", "model", "color"]
+# the `cars` table is copied into one contiguous chunk beyond this many
+MAX_CHUNKS = 64
+
+
+class Flyweight:
+    def __init__(self, shared_state: List[str]) -> None:
+        self._shared_state = shared_state
+
+    def operation(self, unique_state: List[str]) -> None:
+        s = json.dumps(self._shared_state)
+        u = json.dumps(unique_state)
+        print(f"Flyweight: Displaying shared ({s}) and unique ({u}) state.")
+
+
+class CarDatabase:
+    def __init__(self, initial_flyweights: List[List[str]] = (), batch_size: int = 100_000) -> None:
+        self._states = pl.DataFrame(
+            schema={"brand": pl.String, "model": pl.String, "color": pl.String, "state": pl.UInt32}
+        )
+        # (brand, model, color) -> state code, for looking up single cars
+        self._state_codes: Dict[Tuple[str, str, str], int] = {}
+        self._chunks: List[pl.DataFrame] = []
+        self._cars = None
+
+        # single cars are buffered and ingested a batch at a time
+        self._pending: Dict[str, list] = {name: [] for name in ("plates", "owner", *STATE)}
+        self._batch_size = batch_size
+
+        if initial_flyweights:
+            self._encode(pl.DataFrame(list(initial_flyweights), schema=STATE, orient="row"))
+
+    # ---------- ingestion ----------
+
+    def _encode(self, batch: pl.DataFrame) -> pl.DataFrame:
+        """
+        `batch` with its brand/model/color replaced by state codes, adding
+        codes for states we haven't seen yet.
+        """
+
+        new_states = (
+            batch.select(STATE)
+            .unique(maintain_order=True)
+            .join(self._states, on=STATE, how="anti")
+        )
+        if new_states.height:
+            start = self._states.height
+            self._states = pl.concat([
+                self._states,
+                new_states.with_columns(state=pl.int_range(start, start + new_states.height, dtype=pl.UInt32)),
+            ])
+            self._state_codes.update(zip(new_states.iter_rows(), range(start, self._states.height)))
+
+        return batch.join(self._states, on=STATE, how="left", maintain_order="left").drop(STATE)
+
+    def add_cars(self, cars: pl.DataFrame) -> None:
+        """
+        Bulk ingestion: `cars` has plates, owner, brand, model and color columns.
+        """
+
+        self.flush()
+        self._chunks.append(self._encode(cars.select("plates", "owner", *STATE)))
+        self._cars = None
+
+    def add_car(self, plates: str, owner: str, brand: str, model: str, color: str) -> None:
+        for name, value in zip(self._pending, (plates, owner, brand, model, color)):
+            self._pending[name].append(value)
+
+        if len(self._pending["plates"]) >= self._batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending["plates"]:
+            return
+
+        batch = pl.DataFrame(self._pending, schema={name: pl.String for name in self._pending})
+        for column in self._pending.values():
+            column.clear()
+        self._chunks.append(self._encode(batch))
+        self._cars = None
+
+    @property
+    def cars(self) -> pl.DataFrame:
+        """
+        plates, owner and the state code of every car.
+        """
+
+        self.flush()
+        if self._cars is None:
+            if self._chunks:
+                # only links the chunks together, nothing is copied
+                cars = pl.concat(self._chunks, rechunk=False)
+                if cars.n_chunks() > MAX_CHUNKS:
+                    # too many small chunks slow queries down: copy them into one, now and then
+                    cars = cars.rechunk()
+                self._cars = cars
+            else:
+                self._cars = pl.DataFrame(schema={"plates": pl.String, "owner": pl.String, "state": pl.UInt32})
+            self._chunks = [self._cars]
+        return self._cars
+
+    @property
+    def states(self) -> pl.DataFrame:
+        # pending cars may bring new states
+        self.flush()
+        return self._states
+
+    def __len__(self) -> int:
+        return self.cars.height
+
+    # ---------- queries ----------
+
+    def flyweight(self, state: int) -> Flyweight:
+        row = self._states.row(state, named=True)
+        return Flyweight([row[name] for name in STATE])
+
+    def count_by(self, column: str = "brand") -> pl.DataFrame:
+        per_state = self.cars.group_by("state").len()
+        return (
+            per_state.join(self._states, on="state")
+            .group_by(column)
+            .agg(pl.col("len").sum().alias("cars"))
+            .sort("cars", descending=True)
+        )
+
+    def filter_by(self, **state: str) -> pl.DataFrame:
+        """
+        e.g. filter_by(color="red") or filter_by(brand="BMW", color="red")
+        """
+
+        cars = self.cars
+        matching = self._states.filter(
+            pl.all_horizontal([pl.col(name) == value for name, value in state.items()])
+        )
+        return (
+            cars.filter(pl.col("state").is_in(matching["state"].implode()))
+            .join(matching, on="state", how="left", maintain_order="left")
+            .drop("state")
+        )
+
+    def describe_car(self, plates: str, owner: str, brand: str, model: str, color: str) -> None:
+        """
+        Describe a car from its own values, without flushing pending cars or
+        scanning the table. Its state may still be pending, then it has no
+        code yet.
+        """
+
+        state = self._state_codes.get((brand, model, color))
+        flyweight = self.flyweight(state) if state is not None else Flyweight([brand, model, color])
+        flyweight.operation([plates, owner])
+
+    def describe(self, plates: str) -> None:
+        for row in self.cars.filter(pl.col("plates") == plates).iter_rows(named=True):
+            self.flyweight(row["state"]).operation([row["plates"], row["owner"]])
+
+    def nbytes(self) -> int:
+        return int(self.cars.estimated_size() + self._states.estimated_size())
+
+
+def add_car_to_police_database(
+    database: CarDatabase,
+    plates: str, owner: str,
+    brand: str, model: str, color: str
+) -> None:
+    print("\nClient: Adding a car to database.")
+    database.add_car(plates, owner, brand, model, color)
+    database.describe_car(plates, owner, brand, model, color)
+
+
+def random_cars(count: int, models: int = 2_000, seed: int = 0) -> pl.DataFrame:
+    rng = np.random.default_rng(seed)
+    brands = np.array(["Chevrolet", "Mercedes Benz", "BMW", "Audi", "Toyota", "Ford", "Kia"])
+    colors = np.array(["pink", "black", "red", "white", "blue", "silver"])
+    owners = np.array(["James Doe", "Jane Roe", "John Smith", "Ann Lee"])
+
+    model = rng.integers(0, models, count)
+    return pl.DataFrame({
+        "plates": pl.Series(rng.integers(0, 10_000_000, count)).cast(pl.String).str.zfill(7),
+        "owner": owners[rng.integers(0, len(owners), count)],
+        "brand": brands[model % len(brands)],
+        "model": pl.Series(model).cast(pl.String),
+        "color": colors[rng.integers(0, len(colors), count)],
+    })
+
+
+def object_bytes_per_car(count: int = 200_000) -> float:
+    """
+    Memory per car with one extrinsic list per car, like flyweight.py.
+    """
+
+    cars = random_cars(count).rows()
+    tracemalloc.start()
+    flyweights: Dict[str, List[str]] = {}
+    database: List[Tuple[List[str], List[str]]] = []
+    for plates, owner, brand, model, color in cars:
+        key = "_".join(sorted([brand, model, color]))
+        flyweight = flyweights.setdefault(key, [brand, model, color])
+        database.append((flyweight, [plates, owner]))
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return memory / count
+
+
+def benchmark(count: int = 10_000_000, batch: int = 1_000_000) -> None:
+    database = CarDatabase()
+    ingest = 0.0
+    for offset in range(0, count, batch):
+        cars = random_cars(min(batch, count - offset), seed=offset)
+        start = time.perf_counter()
+        database.add_cars(cars)
+        ingest += time.perf_counter() - start
+
+    start = time.perf_counter()
+    len(database)
+    ingest += time.perf_counter() - start
+    print(f"{count:,} cars, {database.states.height:,} flyweights:")
+    print(f"  bulk ingest:          {ingest:6.2f} s")
+    print(f"  memory:               {database.nbytes() / count:6.1f} bytes/car "
+          f"(one list per car: {object_bytes_per_car():.1f} bytes/car)")
+
+    singles = random_cars(10_000, seed=count).rows()
+    start = time.perf_counter()
+    # describing a car prints it: with sys.stdout set to None, print does nothing
+    with contextlib.redirect_stdout(None):
+        for car in singles:
+            add_car_to_police_database(database, *car)
+    print(f"  add one car:          {(time.perf_counter() - start) / len(singles) * 1e6:6.1f} us/car")
+    count += len(singles)
+
+    start = time.perf_counter()
+    per_brand = database.count_by("brand")
+    print(f"  count per brand:      {(time.perf_counter() - start) * 1e3:6.1f} ms")
+
+    start = time.perf_counter()
+    red = database.filter_by(color="red")
+    print(f"  filter by color:      {(time.perf_counter() - start) * 1e3:6.1f} ms, {red.height:,} red cars")
+    assert per_brand["cars"].sum() == count
+
+
+if __name__ == "__main__":
+    database = CarDatabase([
+        ["Chevrolet", "Camaro2018", "pink"],
+        ["Mercedes Benz", "C300", "black"],
+        ["Mercedes Benz", "C500", "red"],
+        ["BMW", "M5", "red"],
+        ["BMW", "X6", "white"],
+    ])
+
+    print(f"CarDatabase: I have {database.states.height} flyweights:")
+    print(database.states)
+
+    add_car_to_police_database(
+        database, "CL234IR", "James Doe", "BMW", "M5", "red"
+    )
+
+    add_car_to_police_database(
+        database, "CL235IR", "James Doe", "BMW", "X1", "red"
+    )
+
+    print(f"\nCarDatabase: I have {database.states.height} flyweights")
+    print(database.filter_by(color="red"))
+    print(database.count_by("brand"))
+    print()
+
+    benchmark()
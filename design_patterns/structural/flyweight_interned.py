@@ -0,0 +1,257 @@
+"""
+A flyweight factory keyed on tuples, with a memory budget.
+
+FlyweightFactory.get_key in flyweight.py sorts the state and joins it with
+"_" on every lookup. That allocates a list and a string per call, and
+different states can end up with the same key (["a_b"] and ["a", "b"] both
+become "a_b"). Flyweight.operation also runs json.dumps on the shared state
+every time it is called.
+
+Here:
+
+- the key is the sorted state as a tuple, so like in flyweight.py the order
+  of the items doesn't matter, but without joining there are no collisions.
+  Sorting only happens the first time an ordering is seen: after that, a dict
+  maps it straight to its key. Strings are interned when a flyweight is
+  created, so every flyweight (and every client that interns its inputs)
+  shares one copy
+- each flyweight serialises its shared state once, when it is created
+- the factory keeps its flyweights in LRU order and evicts the least recently
+  used once their estimated size goes over `max_bytes`. Evicted flyweights
+  that clients still hold are remembered through weak references, so asking
+  again gives back the same object, never a second copy
+- `stats` counts hits, misses, evictions and the estimated bytes held
+
+>> uv run python design_patterns/structural/flyweight_interned.py
+"""
+
+import json
+import random
+import sys
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from json.encoder import encode_basestring_ascii
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+
+class Flyweight:
+    __slots__ = ("_shared_state", "_shared_json", "__weakref__")
+
+    def __init__(self, shared_state: Tuple[str, ...]) -> None:
+        self._shared_state = shared_state
+        self._shared_json = json.dumps(list(shared_state))
+
+    @property
+    def shared_state(self) -> Tuple[str, ...]:
+        return self._shared_state
+
+    def describe(self, unique_state: Sequence[str]) -> str:
+        # what json.dumps gives for a list of strings, without its setup cost
+        u = f"[{', '.join(map(encode_basestring_ascii, unique_state))}]"
+        return f"Flyweight: Displaying shared ({self._shared_json}) and unique ({u}) state."
+
+    def operation(self, unique_state: List[str]) -> None:
+        print(self.describe(unique_state))
+
+    def nbytes(self) -> int:
+        return (
+            sys.getsizeof(self) + sys.getsizeof(self._shared_state) + sys.getsizeof(self._shared_json)
+            + sum(sys.getsizeof(item) for item in self._shared_state)
+        )
+
+
+@dataclass
+class FlyweightStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    revived: int = 0
+    nbytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class FlyweightFactory:
+    def __init__(
+        self,
+        initial_flyweights: Iterable[Sequence[str]] = (),
+        max_bytes: int = 64 * 2 ** 20,
+        verbose: bool = False,
+    ) -> None:
+        self._flyweights: "OrderedDict[Tuple[str, ...], Flyweight]" = OrderedDict()
+        # every ordering of a state seen so far -> its key
+        self._keys: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        # evicted, but maybe still used by somebody
+        self._evicted: "weakref.WeakValueDictionary[Tuple[str, ...], Flyweight]" = weakref.WeakValueDictionary()
+        self._max_bytes = max_bytes
+        self._verbose = verbose
+        self.stats = FlyweightStats()
+
+        for state in initial_flyweights:
+            self.get_flyweight(state)
+        self.stats.misses = 0
+
+    @staticmethod
+    def get_key(state: Sequence[str]) -> Tuple[str, ...]:
+        return tuple(sorted(state))
+
+    def get_flyweight(self, shared_state: Sequence[str]) -> Flyweight:
+        state = shared_state if type(shared_state) is tuple else tuple(shared_state)
+        key = self._keys.get(state)
+        if key is None:
+            key = self.get_key(state)
+            # share the tuple when the state was already sorted
+            self._keys[state] = key = state if key == state else key
+        else:
+            flyweights = self._flyweights
+            flyweight = flyweights.get(key)
+            if flyweight is not None:
+                flyweights.move_to_end(key)
+                self.stats.hits += 1
+                if self._verbose:
+                    print("FlyweightFactory: Reusing existing flyweight.")
+                return flyweight
+
+        return self._add(key, state)
+
+    def _add(self, key: Tuple[str, ...], state: Tuple[str, ...]) -> Flyweight:
+        flyweight = self._evicted.pop(key, None)
+        if flyweight is not None:
+            self.stats.revived += 1
+        else:
+            self.stats.misses += 1
+            if self._verbose:
+                print("FlyweightFactory: Can't find a flyweight, creating new one.")
+            flyweight = Flyweight(tuple(sys.intern(item) for item in state))
+
+        self._flyweights[key] = flyweight
+        self.stats.nbytes += flyweight.nbytes()
+
+        while self.stats.nbytes > self._max_bytes and len(self._flyweights) > 1:
+            old_key, old = self._flyweights.popitem(last=False)
+            self._evicted[old_key] = old
+            self.stats.nbytes -= old.nbytes()
+            self.stats.evictions += 1
+
+        return flyweight
+
+    def __len__(self) -> int:
+        return len(self._flyweights)
+
+    def list_flyweights(self) -> None:
+        count = len(self._flyweights)
+        print(f"FlyweightFactory: I have {count} flyweights:")
+        print("\n".join(json.dumps(list(key)) for key in self._flyweights))
+
+
+def add_car_to_police_database(
+    factory: FlyweightFactory,
+    plates: str, owner: str,
+    brand: str, model: str, color: str
+) -> str:
+    flyweight = factory.get_flyweight((brand, model, color))
+    return flyweight.describe((plates, owner))
+
+
+class ClassicFactory:
+    """
+    The lookup and serialisation from flyweight.py, without the prints, for
+    the benchmark.
+    """
+
+    def __init__(self) -> None:
+        self._flyweights = {}
+
+    def get_flyweight(self, shared_state: List[str]) -> List[str]:
+        key = "_".join(sorted(shared_state))
+        if key not in self._flyweights:
+            self._flyweights[key] = shared_state
+        return self._flyweights[key]
+
+
+def classic_add_car(factory: ClassicFactory, plates, owner, brand, model, color) -> str:
+    shared_state = factory.get_flyweight([brand, model, color])
+    s = json.dumps(shared_state)
+    u = json.dumps([plates, owner])
+    return f"Flyweight: Displaying shared ({s}) and unique ({u}) state."
+
+
+def random_cars(count: int, models: int = 2_000) -> List[Tuple[str, ...]]:
+    brands = ["Chevrolet", "Mercedes Benz", "BMW", "Audi", "Toyota", "Ford", "Kia"]
+    colors = ["pink", "black", "red", "white", "blue", "silver"]
+    catalogue = [
+        (random.choice(brands), f"M{i}", random.choice(colors)) for i in range(models)
+    ]
+    plates = [f"CL{i:05d}" for i in range(1000)]
+    owners = ["James Doe", "Jane Roe", "John Smith", "Ann Lee"]
+    return [
+        (random.choice(plates), random.choice(owners), *random.choice(catalogue))
+        for _ in range(count)
+    ]
+
+
+def benchmark(count: int = 1_000_000, chunk: int = 1_000_000) -> None:
+    """
+    Records are generated and ingested `chunk` at a time, so
+    `benchmark(10_000_000)` runs the full 10M without holding them all.
+    """
+
+    print(f"ingesting {count:,} add_car_to_police_database records:")
+    timings = {"flyweight.py lookup": 0.0, "interned tuple keys": 0.0, "  with a 500 KB budget": 0.0}
+    factories = {}
+    for name in timings:
+        if name == "flyweight.py lookup":
+            factories[name] = (ClassicFactory(), classic_add_car)
+        else:
+            max_bytes = 500_000 if "budget" in name else 64 * 2 ** 20
+            factories[name] = (FlyweightFactory(max_bytes=max_bytes), add_car_to_police_database)
+
+    done = 0
+    while done < count:
+        cars = random_cars(min(chunk, count - done))
+        for name, (factory, add_car) in factories.items():
+            start = time.perf_counter()
+            for car in cars:
+                add_car(factory, *car)
+            timings[name] += time.perf_counter() - start
+        done += len(cars)
+
+    for name, elapsed in timings.items():
+        print(f"  {name:>22}: {elapsed:6.2f} s, {elapsed / count * 1e9:5.0f} ns/record")
+        factory = factories[name][0]
+        if isinstance(factory, FlyweightFactory):
+            print(f"  {'':>22}  {factory.stats}, hit rate {factory.stats.hit_rate:.2%}")
+
+
+if __name__ == "__main__":
+    factory = FlyweightFactory([
+        ["Chevrolet", "Camaro2018", "pink"],
+        ["Mercedes Benz", "C300", "black"],
+        ["Mercedes Benz", "C500", "red"],
+        ["BMW", "M5", "red"],
+        ["BMW", "X6", "white"],
+    ], verbose=True)
+
+    factory.list_flyweights()
+
+    print("\nClient: Adding a car to database.")
+    print(add_car_to_police_database(factory, "CL234IR", "James Doe", "BMW", "M5", "red"))
+
+    print("\nClient: Adding a car to database.")
+    print(add_car_to_police_database(factory, "CL234IR", "James Doe", "BMW", "X1", "red"))
+
+    print()
+    factory.list_flyweights()
+
+    assert factory.get_flyweight(["a_b"]) is not factory.get_flyweight(["a", "b"])
+    assert factory.get_flyweight(["red", "BMW", "M5"]) is factory.get_flyweight(["BMW", "M5", "red"])
+    unique = ["é\"x", "O'Neil"]
+    assert factory.get_flyweight(["BMW", "M5", "red"]).describe(unique).endswith(f"({json.dumps(unique)}) state.")
+    print(f"\n{factory.stats}\n")
+
+    benchmark()
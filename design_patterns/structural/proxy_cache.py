@@ -0,0 +1,228 @@
+"""
+A caching, lazy-loading Proxy.
+
+Proxy.request in proxy.py mentions lazy loading and caching, but only checks
+access and logs around every call. CachingProxy does the rest:
+
+- lazy loading: the RealSubject is only built on the first request
+- caching: results are kept per argument tuple, for `ttl` seconds, in an LRU
+  of at most `max_size` entries
+- stampede protection: if several threads miss on the same arguments at the
+  same time, one of them calls the real subject and the others wait for its
+  result
+- stale-while-revalidate: for `stale_ttl` seconds after expiring, an entry is
+  still served right away while a background thread refreshes it
+- logging: `log_access` only puts a record on a queue; a background thread
+  writes the records out in batches
+
+>> uv run python design_patterns/structural/proxy_cache.py
+"""
+
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from queue import Empty, SimpleQueue
+from typing import Any, Callable, Dict, Hashable, Optional, TextIO, Tuple
+
+
+class Subject(ABC):
+    @abstractmethod
+    def request(self, *args: Hashable) -> Any:
+        pass
+
+
+class RealSubject(Subject):
+    """
+    Expensive to build and slow to answer.
+    """
+
+    def __init__(self) -> None:
+        print("RealSubject: Loading, this takes a while.")
+        time.sleep(0.5)
+        self.calls = 0
+
+    def request(self, *args: Hashable) -> str:
+        self.calls += 1
+        time.sleep(0.2)
+        return f"RealSubject: Handled request {args} (call #{self.calls})."
+
+
+class AsyncAccessLogger:
+    """
+    `log` only enqueues; a daemon thread writes whatever has piled up every
+    `interval` seconds, in one write.
+    """
+
+    def __init__(self, sink: TextIO = sys.stdout, interval: float = 0.1) -> None:
+        self._sink = sink
+        self._interval = interval
+        self._queue: SimpleQueue = SimpleQueue()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def log(self, args: Tuple, outcome: str) -> None:
+        self._queue.put((time.time(), args, outcome))
+
+    def _drain(self) -> None:
+        lines = []
+        try:
+            while True:
+                at, args, outcome = self._queue.get_nowait()
+                lines.append(f"Proxy: {time.strftime('%H:%M:%S', time.localtime(at))} {outcome} {args}\n")
+        except Empty:
+            pass
+
+        if lines:
+            self._sink.write("".join(lines))
+            self._sink.flush()
+
+    def _run(self) -> None:
+        while not self._closed.wait(self._interval):
+            self._drain()
+        self._drain()
+
+    def close(self) -> None:
+        self._closed.set()
+        self._thread.join()
+
+
+class CachingProxy(Subject):
+    def __init__(
+        self,
+        factory: Callable[[], Subject] = RealSubject,
+        ttl: float = 60.0,
+        stale_ttl: float = 0.0,
+        max_size: int = 1024,
+        logger: Optional[AsyncAccessLogger] = None,
+    ) -> None:
+        self._factory = factory
+        self._real_subject: Optional[Subject] = None
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._max_size = max_size
+        self._logger = logger
+
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        # args -> (result, time it was fetched)
+        self._cache: "OrderedDict[Tuple, Tuple[Any, float]]" = OrderedDict()
+        # args -> result of the real call that is running for them
+        self._in_flight: Dict[Tuple, Future] = {}
+        self._refresher = ThreadPoolExecutor(max_workers=4, thread_name_prefix="refresh")
+
+    @property
+    def real_subject(self) -> Subject:
+        subject = self._real_subject
+        if subject is None:
+            with self._load_lock:
+                if self._real_subject is None:
+                    self._real_subject = self._factory()
+                subject = self._real_subject
+        return subject
+
+    def request(self, *args: Hashable) -> Any:
+        if not self.check_access():
+            raise PermissionError(f"No access to {args}")
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(args)
+            if entry is not None:
+                result, fetched_at = entry
+                age = now - fetched_at
+                if age < self._ttl:
+                    self._cache.move_to_end(args)
+                    self.log_access(args, "hit")
+                    return result
+
+                if age < self._ttl + self._stale_ttl:
+                    self._cache.move_to_end(args)
+                    if args not in self._in_flight:
+                        self._in_flight[args] = self._refresher.submit(self._load, args)
+                    self.log_access(args, "stale")
+                    return result
+
+            future = self._in_flight.get(args)
+            leader = future is None
+            if leader:
+                future = self._in_flight[args] = Future()
+
+        if not leader:
+            self.log_access(args, "wait")
+            return future.result()
+
+        self.log_access(args, "miss")
+        try:
+            result = self._load(args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        future.set_result(result)
+        return result
+
+    def _load(self, args: Tuple) -> Any:
+        """
+        Call the real subject and store the result. Whoever put the entry in
+        `_in_flight` is responsible for taking it out again.
+        """
+
+        try:
+            result = self.real_subject.request(*args)
+            with self._lock:
+                self._cache[args] = (result, time.monotonic())
+                self._cache.move_to_end(args)
+                while len(self._cache) > self._max_size:
+                    self._cache.popitem(last=False)
+            return result
+        finally:
+            with self._lock:
+                self._in_flight.pop(args, None)
+
+    def check_access(self) -> bool:
+        return True
+
+    def log_access(self, args: Tuple, outcome: str) -> None:
+        if self._logger is not None:
+            self._logger.log(args, outcome)
+
+    def close(self) -> None:
+        self._refresher.shutdown(wait=True)
+
+
+def client_code(subject: Subject, *args: Hashable) -> None:
+    print(subject.request(*args))
+
+
+if __name__ == "__main__":
+    logger = AsyncAccessLogger()
+    proxy = CachingProxy(ttl=0.5, stale_ttl=2.0, logger=logger)
+    print("Client: The proxy exists, but the real subject hasn't been built yet.")
+
+    print("\nClient: 8 threads ask for the same thing at once:")
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client_code, args=(proxy, "report", 2024)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"Client: took {time.perf_counter() - start:.2f}s, {proxy.real_subject.calls} real call(s)")
+
+    print("\nClient: Asking again, from the cache:")
+    client_code(proxy, "report", 2024)
+
+    time.sleep(0.6)
+    print("\nClient: The entry has expired, the stale result comes back at once:")
+    start = time.perf_counter()
+    client_code(proxy, "report", 2024)
+    print(f"Client: took {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+    time.sleep(0.3)
+    print("\nClient: ...and the refreshed one shortly after:")
+    client_code(proxy, "report", 2024)
+
+    proxy.close()
+    logger.close()
@@ -0,0 +1,326 @@
+"""
+A remote Proxy: the RealSubject lives in another process.
+
+Proxy in proxy.py wraps a RealSubject in the same process. RemoteProxy has the
+same interface, but forwards every call over a Unix socket to a server
+process that owns the RealSubject, which keeps a heavy subject (memory,
+crashes, the GIL) out of the client process.
+
+Round trips are kept cheap by:
+
+- a small binary framing: a fixed 10-byte header (payload length, call id,
+  method id) followed by the pickled arguments
+- pipelining: every call gets an id, so any number of calls can be in flight
+  on one connection and their results may come back in any order
+- micro-batching: calls made within `window` seconds of each other (by
+  default, within the same event loop iteration) are sent with one write, and
+  the server answers everything it read in one go with one write as well. A
+  call made while nothing else is in flight is sent straight away
+
+>> uv run python design_patterns/structural/proxy_remote.py
+"""
+
+import asyncio
+import multiprocessing
+import os
+import pickle
+import socket
+import struct
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from multiprocessing.managers import BaseManager
+from typing import Any, Dict, List, Optional, Tuple
+
+# request: payload length, call id, method id
+REQUEST = struct.Struct("<IIH")
+# response: payload length, call id, ok
+RESPONSE = struct.Struct("<IIH")
+
+READ_SIZE = 256 * 1024
+
+
+class Subject(ABC):
+    @abstractmethod
+    def request(self, *args: Any) -> Any:
+        pass
+
+    @abstractmethod
+    def ping(self) -> None:
+        pass
+
+
+# both ends agree on the method ids
+METHODS: Tuple[str, ...] = tuple(sorted(Subject.__abstractmethods__))
+
+
+class RealSubject(Subject):
+    def request(self, *args: Any) -> str:
+        return f"RealSubject: Handling request {args} in process {os.getpid()}."
+
+    def ping(self) -> None:
+        return None
+
+
+def _frames(buffer: bytearray, header: struct.Struct) -> Tuple[List[Tuple[int, int, bytes]], int]:
+    """
+    Parse every complete frame in `buffer`. Returns them and how many bytes
+    they used.
+    """
+
+    frames = []
+    offset = 0
+    view = memoryview(buffer)
+    while len(buffer) - offset >= header.size:
+        length, call_id, code = header.unpack_from(buffer, offset)
+        end = offset + header.size + length
+        if end > len(buffer):
+            break
+        frames.append((call_id, code, view[offset + header.size:end].tobytes()))
+        offset = end
+    view.release()
+    return frames, offset
+
+
+# ---------- server ----------
+
+def _serve_connection(subject: Subject, connection: socket.socket) -> None:
+    """
+    A plain blocking loop per connection: one recv, answer every complete
+    frame in it, one sendall.
+    """
+
+    methods = [getattr(subject, name) for name in METHODS]
+    buffer = bytearray()
+
+    with connection:
+        while True:
+            chunk = connection.recv(READ_SIZE)
+            if not chunk:
+                return
+            buffer += chunk
+            frames, used = _frames(buffer, REQUEST)
+            del buffer[:used]
+
+            out = bytearray()
+            for call_id, method_id, payload in frames:
+                try:
+                    result = pickle.dumps(methods[method_id](*pickle.loads(payload)), pickle.HIGHEST_PROTOCOL)
+                    ok = 1
+                except Exception as e:
+                    result = pickle.dumps(e, pickle.HIGHEST_PROTOCOL)
+                    ok = 0
+                out += RESPONSE.pack(len(result), call_id, ok)
+                out += result
+
+            if out:
+                connection.sendall(out)
+
+
+def run_server(path: str, ready: multiprocessing.Event) -> None:
+    subject = RealSubject()
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+        listener.bind(path)
+        listener.listen()
+        ready.set()
+        while True:
+            connection, _ = listener.accept()
+            threading.Thread(target=_serve_connection, args=(subject, connection), daemon=True).start()
+
+
+class SubjectServer:
+    """
+    Starts the server process, and stops it again on exit.
+    """
+
+    def __init__(self) -> None:
+        self._directory = tempfile.mkdtemp(prefix="proxy_")
+        self.path = os.path.join(self._directory, "subject.sock")
+        self._process: Optional[multiprocessing.Process] = None
+
+    def __enter__(self) -> "SubjectServer":
+        ready = multiprocessing.Event()
+        self._process = multiprocessing.Process(target=run_server, args=(self.path, ready), daemon=True)
+        self._process.start()
+        if not ready.wait(10):
+            raise RuntimeError("The subject server didn't start")
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._process.terminate()
+        self._process.join()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        os.rmdir(self._directory)
+
+
+# ---------- client ----------
+
+class RemoteProxy(asyncio.Protocol):
+    """
+    An async Subject: `await proxy.request(...)`.
+    """
+
+    def __init__(self, path: str, window: float = 0.0, max_batch_bytes: int = 64 * 1024) -> None:
+        self._path = path
+        self._window = window
+        self._max_batch_bytes = max_batch_bytes
+        self._transport: Optional[asyncio.Transport] = None
+        self._closed: Optional[asyncio.Future] = None
+
+        self._next_id = 0
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._batch = bytearray()
+        self._flush_scheduled = False
+        self._buffer = bytearray()
+        self.writes = 0
+
+    async def connect(self) -> "RemoteProxy":
+        loop = asyncio.get_running_loop()
+        self._closed = loop.create_future()
+        await loop.create_unix_connection(lambda: self, self._path)
+        return self
+
+    async def close(self) -> None:
+        self._flush()
+        self._transport.close()
+        await self._closed
+
+    async def __aenter__(self) -> "RemoteProxy":
+        return await self.connect()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    # ---------- calls ----------
+
+    def call(self, method: str, *args: Any) -> asyncio.Future:
+        payload = pickle.dumps(args, pickle.HIGHEST_PROTOCOL)
+        call_id = self._next_id = (self._next_id + 1) & 0xFFFFFFFF
+        self._batch += REQUEST.pack(len(payload), call_id, METHODS.index(method))
+        self._batch += payload
+
+        future = asyncio.get_running_loop().create_future()
+        idle = not self._pending
+        self._pending[call_id] = future
+
+        if idle or len(self._batch) >= self._max_batch_bytes:
+            # nothing else in flight: waiting for more calls would only add latency
+            self._flush()
+        elif not self._flush_scheduled:
+            self._flush_scheduled = True
+            loop = asyncio.get_running_loop()
+            if self._window > 0:
+                loop.call_later(self._window, self._flush)
+            else:
+                # still batches everything called in this loop iteration
+                loop.call_soon(self._flush)
+
+        return future
+
+    def _flush(self) -> None:
+        self._flush_scheduled = False
+        if self._batch and not self._transport.is_closing():
+            self._transport.write(bytes(self._batch))
+            self._batch.clear()
+            self.writes += 1
+
+    def request(self, *args: Any) -> asyncio.Future:
+        return self.call("request", *args)
+
+    def ping(self) -> asyncio.Future:
+        return self.call("ping")
+
+    # ---------- protocol callbacks ----------
+
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        self._transport = transport
+
+    def data_received(self, data: bytes) -> None:
+        buffer = self._buffer
+        buffer += data
+        frames, used = _frames(buffer, RESPONSE)
+        del buffer[:used]
+
+        for call_id, ok, payload in frames:
+            future = self._pending.pop(call_id, None)
+            if future is None or future.cancelled():
+                continue
+            result = pickle.loads(payload)
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(result)
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("connection to the subject server closed"))
+        self._pending.clear()
+        self._closed.set_result(None)
+
+
+async def client_code(subject: RemoteProxy) -> None:
+    print(await subject.request("report", 2024))
+
+
+class SubjectManager(BaseManager):
+    pass
+
+
+SubjectManager.register("RealSubject", RealSubject)
+
+
+async def benchmark(path: str, calls: int = 20_000, concurrency: int = 1_000) -> None:
+    print("round trip, one call at a time:")
+
+    manager = SubjectManager()
+    manager.start()
+    managed = manager.RealSubject()
+    n = 2_000
+    start = time.perf_counter()
+    for _ in range(n):
+        managed.ping()
+    managed_latency = (time.perf_counter() - start) / n
+    print(f"  multiprocessing manager proxy: {managed_latency * 1e6:7.1f} us/call")
+    manager.shutdown()
+
+    async with RemoteProxy(path) as proxy:
+        start = time.perf_counter()
+        for _ in range(n):
+            await proxy.ping()
+        print(f"  RemoteProxy:                   {(time.perf_counter() - start) / n * 1e6:7.1f} us/call")
+
+    print(f"throughput, {calls:,} calls, up to {concurrency:,} in flight:")
+    print(f"  manager proxy, one at a time: {1 / managed_latency:10,.0f} calls/s")
+    for window in (0.0, 50e-6):
+        async with RemoteProxy(path, window=window) as proxy:
+            start = time.perf_counter()
+            for offset in range(0, calls, concurrency):
+                results = await asyncio.gather(*(proxy.request(i) for i in range(offset, offset + concurrency)))
+                assert results[-1].startswith(f"RealSubject: Handling request ({offset + concurrency - 1},)")
+            elapsed = time.perf_counter() - start
+            print(f"  RemoteProxy, window {window * 1e6:5.0f} us: {calls / elapsed:10,.0f} calls/s, "
+                  f"{calls / proxy.writes:6.0f} calls per write")
+
+
+async def main(path: str) -> None:
+    async with RemoteProxy(path) as proxy:
+        print(f"Client: Executing the client code from process {os.getpid()} with a remote proxy:")
+        await client_code(proxy)
+
+        try:
+            await proxy.request({"unpicklable": lambda: None})
+        except Exception as e:
+            print(f"Client: A call that fails doesn't break the others: {e!r}")
+        await client_code(proxy)
+    print()
+
+    await benchmark(path)
+
+
+if __name__ == "__main__":
+    with SubjectServer() as server:
+        asyncio.run(main(server.path))